@@ -0,0 +1,63 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 12:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Базы, созданные раньше через create_all, уже содержат эти таблицы -
+    # создаём только недостающие, данные не трогаем
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("telegram_id", sa.BigInteger(), nullable=False),
+            sa.Column("username", sa.String(100)),
+            sa.Column("first_name", sa.String(100)),
+            sa.Column("joined_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_telegram_id", "users", ["telegram_id"], unique=True)
+
+    if "expenses" not in existing:
+        op.create_table(
+            "expenses",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("category", sa.String(50), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+        )
+
+    if "incomes" not in existing:
+        op.create_table(
+            "incomes",
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("amount", sa.Float(), nullable=False),
+            sa.Column("source", sa.String(100)),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("user_id", sa.BigInteger(), nullable=False),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("incomes")
+    op.drop_table("expenses")
+    op.drop_index("ix_users_telegram_id", table_name="users")
+    op.drop_table("users")
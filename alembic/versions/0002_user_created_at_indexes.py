@@ -0,0 +1,57 @@
+"""composite (user_id, created_at DESC) indexes on expenses/incomes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 12:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции,
+    # поэтому выходим в autocommit - таблицы не блокируются на запись
+    with op.get_context().autocommit_block():
+        # INCLUDE (amount, category) - месячные суммы считаются index-only scan'ом
+        op.create_index(
+            "ix_expenses_user_id_created_at",
+            "expenses",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_include=["amount", "category"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_incomes_user_id_created_at",
+            "incomes",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_include=["amount"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_incomes_user_id_created_at",
+            table_name="incomes",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_expenses_user_id_created_at",
+            table_name="expenses",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,48 @@
+"""monthly rollup table for statistics
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 12:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monthly_rollups",
+        sa.Column("user_id", sa.BigInteger(), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("kind", sa.String(10), primary_key=True),
+        sa.Column("label", sa.String(100), primary_key=True),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("operations_count", sa.Integer(), nullable=False),
+    )
+
+    # Заполняем агрегаты из уже накопленных операций
+    op.execute("""
+        INSERT INTO monthly_rollups (user_id, month, kind, label, total, operations_count)
+        SELECT user_id, date_trunc('month', created_at)::date, 'expense', category,
+               sum(amount), count(*)
+        FROM expenses
+        GROUP BY 1, 2, 4
+        UNION ALL
+        SELECT user_id, date_trunc('month', created_at)::date, 'income',
+               coalesce(source, 'Основной доход'), sum(amount), count(*)
+        FROM incomes
+        GROUP BY 1, 2, 4
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table("monthly_rollups")
@@ -0,0 +1,205 @@
+"""store amounts as bigint kopecks
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 14:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (таблица, колонка) с суммами в рублях
+MONEY_COLUMNS = (
+    ("expenses", "amount"),
+    ("incomes", "amount"),
+    ("monthly_rollups", "total"),
+)
+OPERATION_TABLES = ("expenses", "incomes")
+
+# Строк операций на один UPDATE при заполнении копеек
+BACKFILL_BATCH_SIZE = 10_000
+# Пользователей на один пересчёт агрегатов
+ROLLUP_USERS_BATCH_SIZE = 1000
+
+DEFAULT_INCOME_SOURCE = "Основной доход"
+
+# Агрегаты в копейках одного пользователя: сумма округлённых строк, а не округлённая сумма
+ROLLUP_FROM_OPERATIONS = f"""
+    SELECT user_id, date_trunc('month', created_at)::date AS month, 'expense' AS kind, category AS label,
+           sum(amount) AS total, sum(amount_kopecks) AS total_kopecks, count(*) AS operations_count
+    FROM expenses WHERE user_id IN ({{users}})
+    GROUP BY 1, 2, 4
+    UNION ALL
+    SELECT user_id, date_trunc('month', created_at)::date, 'income', coalesce(source, '{DEFAULT_INCOME_SOURCE}'),
+           sum(amount), sum(amount_kopecks), count(*)
+    FROM incomes WHERE user_id IN ({{users}})
+    GROUP BY 1, 2, 4
+"""
+
+
+def _backfill(table: str) -> None:
+    """Копейки пачками по id: каждая пачка - своя короткая транзакция"""
+    bind = op.get_bind()
+    max_id = bind.scalar(sa.text(f"SELECT max(id) FROM {table}")) or 0
+    for batch_start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        bind.execute(sa.text(f"""
+            UPDATE {table} SET amount_kopecks = round(amount * 100)
+            WHERE id > :batch_start AND id <= :batch_end AND amount_kopecks IS NULL
+        """), {"batch_start": batch_start, "batch_end": batch_start + BACKFILL_BATCH_SIZE})
+
+
+def _backfill_rollups() -> None:
+    """total_kopecks - из уже переведённых строк, пачками пользователей"""
+    bind = op.get_bind()
+    after_user_id = -1
+    while True:
+        users = bind.execute(sa.text("""
+            SELECT DISTINCT user_id FROM monthly_rollups WHERE user_id > :after
+            ORDER BY user_id LIMIT :limit
+        """), {"after": after_user_id, "limit": ROLLUP_USERS_BATCH_SIZE}).scalars().all()
+        if not users:
+            return
+
+        user_list = ", ".join(str(int(user_id)) for user_id in users)
+        bind.execute(sa.text(f"""
+            UPDATE monthly_rollups r SET total_kopecks = coalesce(s.total_kopecks, 0)
+            FROM monthly_rollups r2
+            LEFT JOIN ({ROLLUP_FROM_OPERATIONS.format(users=user_list)}) s
+                ON s.user_id = r2.user_id AND s.month = r2.month AND s.kind = r2.kind AND s.label = r2.label
+            WHERE r2.user_id IN ({user_list})
+              AND r.user_id = r2.user_id AND r.month = r2.month AND r.kind = r2.kind AND r.label = r2.label
+        """))
+        after_user_id = users[-1]
+
+
+def upgrade() -> None:
+    # Без перезаписи таблиц под ACCESS EXCLUSIVE (ALTER ... TYPE): новые колонки заполняются
+    # пачками в autocommit, а в конце короткой транзакцией подменяют старые.
+    # Пока идёт заполнение, прежняя версия бота продолжает писать рубли - триггеры
+    # переводят новые строки в копейки и запоминают пользователей, у которых менялись
+    # операции: их агрегаты в конце пересчитываются заново
+
+    # 1. Пустые колонки, триггеры на время миграции
+    for table, column in MONEY_COLUMNS:
+        op.add_column(table, sa.Column(f"{column}_kopecks", sa.BigInteger()))
+    op.create_table(
+        "kopecks_migration_users",
+        sa.Column("user_id", sa.BigInteger(), primary_key=True),
+    )
+    op.execute("""
+        CREATE FUNCTION kopecks_migration_new_row() RETURNS trigger AS $$
+        BEGIN
+            NEW.amount_kopecks := round(NEW.amount * 100);
+            RETURN NEW;
+        END $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION kopecks_migration_touch_user() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO kopecks_migration_users (user_id)
+            VALUES (CASE WHEN TG_OP = 'DELETE' THEN OLD.user_id ELSE NEW.user_id END)
+            ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+    """)
+    # Новые группы агрегатов получают 0 - пользователь уже отмечен и будет пересчитан
+    op.execute("""
+        CREATE FUNCTION kopecks_migration_new_rollup() RETURNS trigger AS $$
+        BEGIN
+            NEW.total_kopecks := coalesce(NEW.total_kopecks, 0);
+            RETURN NEW;
+        END $$ LANGUAGE plpgsql
+    """)
+    for table in OPERATION_TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_kopecks_new_row BEFORE INSERT OR UPDATE OF amount ON {table}
+            FOR EACH ROW EXECUTE FUNCTION kopecks_migration_new_row()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_kopecks_touch_user AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION kopecks_migration_touch_user()
+        """)
+    op.execute("""
+        CREATE TRIGGER monthly_rollups_kopecks_new_row BEFORE INSERT ON monthly_rollups
+        FOR EACH ROW EXECUTE FUNCTION kopecks_migration_new_rollup()
+    """)
+
+    # 2. Заполнение, NOT NULL через проверенный CHECK и индексы под новые колонки
+    with op.get_context().autocommit_block():
+        for table in OPERATION_TABLES:
+            _backfill(table)
+        _backfill_rollups()
+
+        for table, column in MONEY_COLUMNS:
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT ck_{table}_{column}_kopecks_not_null "
+                       f"CHECK ({column}_kopecks IS NOT NULL) NOT VALID")
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT ck_{table}_{column}_kopecks_not_null")
+
+        # Удаление старой колонки amount удалит и индекс с INCLUDE (amount)
+        op.create_index(
+            "ix_expenses_user_id_created_at_new",
+            "expenses",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_include=["amount_kopecks", "category"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_incomes_user_id_created_at_new",
+            "incomes",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_include=["amount_kopecks"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+    # 3. Подмена. Запись в таблицы блокируется до конца транзакции; чтение идёт.
+    # Агрегаты пользователей, писавших во время миграции, пересчитываются из строк
+    op.execute("LOCK TABLE expenses, incomes, monthly_rollups IN SHARE ROW EXCLUSIVE MODE")
+    touched = "SELECT user_id FROM kopecks_migration_users"
+    op.execute(f"DELETE FROM monthly_rollups WHERE user_id IN ({touched})")
+    op.execute(f"""
+        INSERT INTO monthly_rollups (user_id, month, kind, label, total, total_kopecks, operations_count)
+        {ROLLUP_FROM_OPERATIONS.format(users=touched)}
+    """)
+
+    for table in OPERATION_TABLES:
+        op.execute(f"DROP TRIGGER {table}_kopecks_new_row ON {table}")
+        op.execute(f"DROP TRIGGER {table}_kopecks_touch_user ON {table}")
+    op.execute("DROP TRIGGER monthly_rollups_kopecks_new_row ON monthly_rollups")
+    op.execute("DROP FUNCTION kopecks_migration_new_row()")
+    op.execute("DROP FUNCTION kopecks_migration_touch_user()")
+    op.execute("DROP FUNCTION kopecks_migration_new_rollup()")
+    op.drop_table("kopecks_migration_users")
+
+    # С проверенным CHECK SET NOT NULL не сканирует таблицу
+    for table, column in MONEY_COLUMNS:
+        op.drop_column(table, column)
+        op.alter_column(table, f"{column}_kopecks", new_column_name=column, nullable=False)
+        op.drop_constraint(f"ck_{table}_{column}_kopecks_not_null", table, type_="check")
+    for table in OPERATION_TABLES:
+        op.drop_index(f"ix_{table}_user_id_created_at", table_name=table, if_exists=True)
+        op.execute(f"ALTER INDEX ix_{table}_user_id_created_at_new RENAME TO ix_{table}_user_id_created_at")
+
+    # Незавершённые диалоги хранят сумму в рублях - после миграции её прочли бы как копейки
+    op.execute("DELETE FROM fsm_states WHERE data ? 'amount'")
+
+
+def downgrade() -> None:
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.Float(),
+            existing_type=sa.BigInteger(),
+            existing_nullable=False,
+            postgresql_using=f"{column} / 100.0",
+        )
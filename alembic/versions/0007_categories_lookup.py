@@ -0,0 +1,278 @@
+"""categories lookup table referenced by smallint ids
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 14:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DEFAULT_INCOME_SOURCE = "Основной доход"
+
+# Категории с клавиатур - их id получаются маленькими и стабильными
+EXPENSE_LABELS = ("🏠 Жилье", "🍎 Продукты", "🚗 Транспорт", "💊 Здоровье", "🎮 Развлечения",
+                  "🛍️ Покупки", "✈️ Путешествия", "📚 Образование", "🍽️ Рестораны и кафе",
+                  "💳 Кредит", "💾 Прочее")
+INCOME_LABELS = ("💼 Зарплата", "💼 Фриланс", "📈 Инвестиции", "🎁 Подарок", "🔄 Возврат долга",
+                 "🏆 Премия", "💸 Прочее", DEFAULT_INCOME_SOURCE)
+
+# Всё, чего нет на клавиатурах (свободный текст прежнего /spent вроде «💾 Еда Продукты На Неделю»,
+# произвольные источники дохода), становится «Прочим», а исходный текст переезжает в описание.
+# Так справочник остаётся маленьким: SMALLINT хватает с запасом
+OTHER_EXPENSE_LABEL = "💾 Прочее"
+OTHER_INCOME_LABEL = "💸 Прочее"
+
+# Строк expenses/incomes на один UPDATE при заполнении новых колонок
+BACKFILL_BATCH_SIZE = 10_000
+# Пользователей на одну пачку пересчёта агрегатов
+ROLLUP_USERS_BATCH_SIZE = 1000
+
+EXPENSE_OTHER_ID = f"(SELECT id FROM categories WHERE kind = 'expense' AND label = '{OTHER_EXPENSE_LABEL}')"
+INCOME_OTHER_ID = f"(SELECT id FROM categories WHERE kind = 'income' AND label = '{OTHER_INCOME_LABEL}')"
+# Текст свободной категории расхода без значка, склеенный с описанием
+EXPENSE_FREE_TEXT = ("concat_ws(' ', nullif(btrim(regexp_replace({row}.category, '^💾', '')), ''), "
+                     "nullif({row}.description, ''))")
+
+# (таблица, новая колонка, подзапрос известного id, id «Прочего», новое описание)
+OPERATION_TABLES = (
+    (
+        "expenses", "category_id",
+        "(SELECT id FROM categories WHERE kind = 'expense' AND label = {row}.category)",
+        EXPENSE_OTHER_ID, EXPENSE_FREE_TEXT,
+    ),
+    (
+        "incomes", "source_id",
+        "(SELECT id FROM categories WHERE kind = 'income' "
+        f"AND label = coalesce({{row}}.source, '{DEFAULT_INCOME_SOURCE}'))",
+        INCOME_OTHER_ID, "{row}.source",
+    ),
+)
+
+ROLLUP_FROM_OPERATIONS = """
+    SELECT user_id, date_trunc('month', created_at)::date, 'expense', category_id, sum(amount), count(*)
+    FROM expenses WHERE user_id IN ({users})
+    GROUP BY 1, 2, 4
+    UNION ALL
+    SELECT user_id, date_trunc('month', created_at)::date, 'income', source_id, sum(amount), count(*)
+    FROM incomes WHERE user_id IN ({users})
+    GROUP BY 1, 2, 4
+"""
+ROLLUP_COLUMNS = "user_id, month, kind, category_id, total, operations_count"
+
+
+def _backfill(table: str, column: str, known_id: str, other_id: str, free_text: str) -> None:
+    """Заполнить колонку пачками по id: каждая пачка - своя короткая транзакция"""
+    bind = op.get_bind()
+    max_id = bind.scalar(sa.text(f"SELECT max(id) FROM {table}")) or 0
+    for batch_start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        batch = f"{table}.id > :batch_start AND {table}.id <= :batch_end AND {table}.{column} IS NULL"
+        params = {"batch_start": batch_start, "batch_end": batch_start + BACKFILL_BATCH_SIZE}
+        bind.execute(sa.text(f"UPDATE {table} SET {column} = {known_id.format(row=table)} WHERE {batch}"), params)
+        bind.execute(sa.text(f"""
+            UPDATE {table} SET {column} = {other_id}, description = {free_text.format(row=table)}
+            WHERE {batch}
+        """), params)
+
+
+def _fill_new_rollups() -> None:
+    """Агрегаты по category_id - заново из строк, пачками пользователей"""
+    bind = op.get_bind()
+    after_user_id = -1
+    while True:
+        users = bind.execute(sa.text("""
+            SELECT DISTINCT user_id FROM monthly_rollups WHERE user_id > :after
+            ORDER BY user_id LIMIT :limit
+        """), {"after": after_user_id, "limit": ROLLUP_USERS_BATCH_SIZE}).scalars().all()
+        if not users:
+            return
+
+        user_list = ", ".join(str(int(user_id)) for user_id in users)
+        bind.execute(sa.text(f"""
+            INSERT INTO monthly_rollups_new ({ROLLUP_COLUMNS})
+            {ROLLUP_FROM_OPERATIONS.format(users=user_list)}
+            ON CONFLICT DO NOTHING
+        """))
+        after_user_id = users[-1]
+
+
+def upgrade() -> None:
+    # Схема меняется без долгих блокировок таблиц, как в 0002 и 0006: в транзакциях миграции
+    # только быстрые изменения каталога, заполнение колонок, индексы и проверки ограничений
+    # идут в autocommit. Пока идёт заполнение, прежняя версия бота пишет названия - триггеры
+    # переводят новые строки в id и запоминают пользователей, чьи агрегаты нужно пересчитать
+
+    # 1. Справочник только из меток клавиатур, пустые колонки, новая таблица агрегатов, триггеры
+    categories = op.create_table(
+        "categories",
+        sa.Column("id", sa.SmallInteger(), sa.Identity(), primary_key=True),
+        sa.Column("kind", sa.String(10), nullable=False),
+        sa.Column("label", sa.String(100), nullable=False),
+        sa.UniqueConstraint("kind", "label", name="uq_categories_kind_label"),
+    )
+    op.bulk_insert(
+        categories,
+        [{"kind": "expense", "label": label} for label in EXPENSE_LABELS]
+        + [{"kind": "income", "label": label} for label in INCOME_LABELS],
+    )
+    op.add_column("expenses", sa.Column("category_id", sa.SmallInteger()))
+    op.add_column("incomes", sa.Column("source_id", sa.SmallInteger()))
+    op.add_column("incomes", sa.Column("description", sa.Text()))
+    op.create_table(
+        "monthly_rollups_new",
+        sa.Column("user_id", sa.BigInteger(), nullable=False),
+        sa.Column("month", sa.Date(), nullable=False),
+        sa.Column("kind", sa.String(10), nullable=False),
+        sa.Column("category_id", sa.SmallInteger(), nullable=False),
+        sa.Column("total", sa.BigInteger(), nullable=False),
+        sa.Column("operations_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "month", "kind", "category_id", name="monthly_rollups_new_pkey"),
+        sa.ForeignKeyConstraint(["category_id"], ["categories.id"], name="fk_monthly_rollups_category_id"),
+    )
+    op.create_table(
+        "categories_migration_users",
+        sa.Column("user_id", sa.BigInteger(), primary_key=True),
+    )
+
+    op.execute("""
+        CREATE FUNCTION categories_migration_touch_user() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO categories_migration_users (user_id)
+            VALUES (CASE WHEN TG_OP = 'DELETE' THEN OLD.user_id ELSE NEW.user_id END)
+            ON CONFLICT DO NOTHING;
+            RETURN NULL;
+        END $$ LANGUAGE plpgsql
+    """)
+    for table, column, known_id, other_id, free_text in OPERATION_TABLES:
+        label_column = "category" if table == "expenses" else "source"
+        op.execute(f"""
+            CREATE FUNCTION {table}_categories_migration_new_row() RETURNS trigger AS $$
+            BEGIN
+                NEW.{column} := {known_id.format(row="NEW")};
+                IF NEW.{column} IS NULL THEN
+                    NEW.{column} := {other_id};
+                    NEW.description := {free_text.format(row="NEW")};
+                END IF;
+                RETURN NEW;
+            END $$ LANGUAGE plpgsql
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_categories_new_row BEFORE INSERT OR UPDATE OF {label_column} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_categories_migration_new_row()
+        """)
+        op.execute(f"""
+            CREATE TRIGGER {table}_categories_touch_user AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION categories_migration_touch_user()
+        """)
+
+    # 2. Заполнение, агрегаты по id, NOT NULL через проверенный CHECK, индексы под временными именами
+    with op.get_context().autocommit_block():
+        for table, column, known_id, other_id, free_text in OPERATION_TABLES:
+            _backfill(table, column, known_id, other_id, free_text)
+        _fill_new_rollups()
+
+        for table, column, *_ in OPERATION_TABLES:
+            op.execute(f"ALTER TABLE {table} ADD CONSTRAINT ck_{table}_{column}_not_null "
+                       f"CHECK ({column} IS NOT NULL) NOT VALID")
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT ck_{table}_{column}_not_null")
+
+        op.create_index(
+            "ix_expenses_user_id_created_at_new",
+            "expenses",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_include=["amount", "category_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            "ix_incomes_user_id_created_at_new",
+            "incomes",
+            ["user_id", sa.text("created_at DESC")],
+            postgresql_include=["amount", "source_id"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+    # 3. Подмена. Запись блокируется до конца транзакции, чтение идёт.
+    # Агрегаты пользователей, писавших во время миграции, пересчитываются из строк
+    op.execute("LOCK TABLE expenses, incomes, monthly_rollups, monthly_rollups_new IN SHARE ROW EXCLUSIVE MODE")
+    touched = "SELECT user_id FROM categories_migration_users"
+    op.execute(f"DELETE FROM monthly_rollups_new WHERE user_id IN ({touched})")
+    op.execute(f"INSERT INTO monthly_rollups_new ({ROLLUP_COLUMNS}) {ROLLUP_FROM_OPERATIONS.format(users=touched)}")
+
+    for table, *_ in OPERATION_TABLES:
+        op.execute(f"DROP TRIGGER {table}_categories_new_row ON {table}")
+        op.execute(f"DROP TRIGGER {table}_categories_touch_user ON {table}")
+        op.execute(f"DROP FUNCTION {table}_categories_migration_new_row()")
+    op.execute("DROP FUNCTION categories_migration_touch_user()")
+    op.drop_table("categories_migration_users")
+
+    # С проверенным CHECK SET NOT NULL не сканирует таблицу; старые колонки удаляются
+    # вместе со своими индексами, новые индексы получают прежние имена
+    for table, column, *_ in OPERATION_TABLES:
+        op.alter_column(table, column, nullable=False)
+        op.drop_constraint(f"ck_{table}_{column}_not_null", table, type_="check")
+        op.drop_column(table, "category" if table == "expenses" else "source")
+        op.drop_index(f"ix_{table}_user_id_created_at", table_name=table, if_exists=True)
+        op.execute(f"ALTER INDEX ix_{table}_user_id_created_at_new RENAME TO ix_{table}_user_id_created_at")
+
+    op.drop_table("monthly_rollups")
+    op.rename_table("monthly_rollups_new", "monthly_rollups")
+    op.execute("ALTER TABLE monthly_rollups RENAME CONSTRAINT monthly_rollups_new_pkey TO monthly_rollups_pkey")
+
+    # Внешние ключи: NOT VALID сейчас, проверка существующих строк - без блокировки записи
+    foreign_keys = (
+        ("fk_expenses_category_id", "expenses", "category_id"),
+        ("fk_incomes_source_id", "incomes", "source_id"),
+    )
+    for name, table, column in foreign_keys:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {name} "
+                   f"FOREIGN KEY ({column}) REFERENCES categories (id) NOT VALID")
+    with op.get_context().autocommit_block():
+        for name, table, _ in foreign_keys:
+            op.execute(f"ALTER TABLE {table} VALIDATE CONSTRAINT {name}")
+
+
+def downgrade() -> None:
+    op.add_column("monthly_rollups", sa.Column("label", sa.String(100)))
+    op.execute("UPDATE monthly_rollups SET label = c.label FROM categories c WHERE c.id = monthly_rollups.category_id")
+    op.alter_column("monthly_rollups", "label", nullable=False)
+    op.drop_constraint("monthly_rollups_pkey", "monthly_rollups", type_="primary")
+    op.drop_column("monthly_rollups", "category_id")
+    op.create_primary_key("monthly_rollups_pkey", "monthly_rollups", ["user_id", "month", "kind", "label"])
+
+    op.add_column("incomes", sa.Column("source", sa.String(100)))
+    op.execute("UPDATE incomes SET source = coalesce(incomes.description, c.label) "
+               "FROM categories c WHERE c.id = incomes.source_id")
+    op.drop_column("incomes", "description")
+    op.drop_column("incomes", "source_id")
+    op.drop_index("ix_incomes_user_id_created_at", table_name="incomes", if_exists=True)
+    op.create_index(
+        "ix_incomes_user_id_created_at",
+        "incomes",
+        ["user_id", sa.text("created_at DESC")],
+        postgresql_include=["amount"],
+    )
+
+    op.add_column("expenses", sa.Column("category", sa.String(50)))
+    op.execute("UPDATE expenses SET category = left(c.label, 50) FROM categories c WHERE c.id = expenses.category_id")
+    op.alter_column("expenses", "category", nullable=False)
+    op.drop_column("expenses", "category_id")
+    op.create_index(
+        "ix_expenses_user_id_created_at",
+        "expenses",
+        ["user_id", sa.text("created_at DESC")],
+        postgresql_include=["amount", "category"],
+        if_not_exists=True,
+    )
+
+    op.drop_table("categories")
@@ -0,0 +1,114 @@
+"""Стоимость одного ответа без сети: текст отчёта + клавиатура, сериализованная для Bot API.
+
+Сравнивает прежнюю схему (новая ReplyKeyboardMarkup на каждый ответ, сериализация
+при отправке, отчёт конкатенацией строк) с готовыми клавиатурами и шаблонами.
+
+Запуск: python -m benchmarks.bench_render [повторов]
+"""
+import json
+import statistics
+import sys
+import time
+
+from aiogram import Bot
+from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import SendMessage
+from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
+
+from keyboards.main_menu import get_main_keyboard
+from keyboards.markup import PrecompiledMarkupSession
+from services.money import format_money
+from services.reports import render_report
+
+STATS = {
+    'total_income': 15_000_000,
+    'total_expenses': 9_876_543,
+    'balance': 5_123_457,
+    'expenses_by_category': {
+        "🏠 Жилье": 4_000_000, "🍎 Продукты": 2_500_000, "🚗 Транспорт": 900_000,
+        "🍽️ Рестораны и кафе": 1_200_000, "🎮 Развлечения": 700_000, "💾 Прочее": 576_543
+    },
+    'month': "Май 2026"
+}
+# Токен нужного формата: запросы не отправляются, формы только собираются
+BENCH_TOKEN = "123456:" + "A" * 35
+CHAT_ID = 1
+
+
+def legacy_main_keyboard() -> ReplyKeyboardMarkup:
+    """Прежняя реализация: дерево pydantic-объектов на каждый вызов"""
+    buttons = [
+        [KeyboardButton(text="📥 Добавить расход"), KeyboardButton(text="💰 Добавить доход")],
+        [KeyboardButton(text="📊 Статистика"), KeyboardButton(text="📋 Последние операции")],
+        [KeyboardButton(text="💡 Советы"), KeyboardButton(text="🗑️ Удалить операцию")],
+        [KeyboardButton(text="ℹ️ Помощь")]
+    ]
+    return ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True)
+
+
+def legacy_render_report(stats: dict) -> str:
+    """Прежняя реализация: отчёт конкатенацией"""
+    total_income = stats['total_income']
+    report = f"📊 <b>Финансовый отчёт за {stats['month']}</b>\n\n"
+    report += f"💰 <b>Доходы:</b> {format_money(total_income)} ₽\n"
+    report += f"📤 <b>Расходы:</b> {format_money(stats['total_expenses'])} ₽\n"
+    report += f"✅ <b>Баланс:</b> {format_money(stats['balance'])} ₽\n"
+    if total_income > 0:
+        report += f"📈 <b>Накопления:</b> {stats['balance'] / total_income * 100:.1f}% от доходов\n\n"
+        report += "📊 <b>Структура бюджета:</b>\n"
+        for category, amount in stats['expenses_by_category'].items():
+            report += f"• {category}: {format_money(amount)} ₽ ({amount / total_income * 100:.1f}% доходов)\n"
+    else:
+        report += "\n"
+    return report
+
+
+def measure(name: str, call, repeats: int):
+    # Замер пачками: один вызов слишком короток для perf_counter
+    batch = 100
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(batch):
+            call()
+        timings.append((time.perf_counter() - started) / batch * 1_000_000)
+
+    timings.sort()
+    p50 = statistics.median(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name:<40} p50 {p50:8.2f} мкс   p99 {p99:8.2f} мкс")
+
+
+def form_fields(form) -> dict:
+    """Поля multipart-формы запроса: имя -> значение"""
+    return {options['name']: value for options, _, value in form._fields}
+
+
+def main(repeats: int):
+    legacy_session = AiohttpSession()
+    session = PrecompiledMarkupSession()
+    legacy_bot = Bot(BENCH_TOKEN, session=legacy_session, default=DefaultBotProperties(parse_mode="HTML"))
+    bot = Bot(BENCH_TOKEN, session=session, default=DefaultBotProperties(parse_mode="HTML"))
+
+    # Запрос собирается так же, как перед отправкой: build_form_data сериализует весь SendMessage
+    def legacy_reply():
+        method = SendMessage(chat_id=CHAT_ID, text=legacy_render_report(STATS), reply_markup=legacy_main_keyboard())
+        return legacy_session.build_form_data(legacy_bot, method)
+
+    def precompiled_reply():
+        method = SendMessage(chat_id=CHAT_ID, text=render_report(STATS), reply_markup=get_main_keyboard())
+        return session.build_form_data(bot, method)
+
+    legacy_fields = form_fields(legacy_reply())
+    fields = form_fields(precompiled_reply())
+    assert json.loads(legacy_fields.pop('reply_markup')) == json.loads(fields.pop('reply_markup'))
+    assert legacy_fields == fields
+
+    print(f"🧾 Отчёт + главное меню, {repeats} замеров по 100 ответов")
+    measure("клавиатура на каждый ответ + конкатенация", legacy_reply, repeats)
+    measure("готовый JSON + шаблоны", precompiled_reply, repeats)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,103 @@
+"""Замер p50/p99 для месячной статистики на засеянной базе.
+
+Запуск: python -m benchmarks.bench_statistics [операций_в_месяц] [повторов]
+Данные пишутся под синтетическим user_id и удаляются в конце.
+"""
+import asyncio
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, func, insert, select
+
+from database.base import AsyncSessionLocal
+from database.models import Expense, Income, MonthlyRollup
+from services.categories import category_registry
+from services.finance_calculations import get_monthly_statistics
+from services.report_cache import report_cache
+from services.rollup import EXPENSE, INCOME, rebuild_monthly_rollup
+
+BENCH_USER_ID = -424242
+CATEGORIES = ["🏠 Жилье", "🍎 Продукты", "🚗 Транспорт", "💊 Здоровье", "🎮 Развлечения",
+              "🛍️ Покупки", "✈️ Путешествия", "📚 Образование", "💳 Кредит", "💾 Прочее"]
+
+
+async def legacy_monthly_statistics(user_id: int, session, month: datetime):
+    """Прежняя реализация: три отдельных запроса по сырым таблицам"""
+    start = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    end = start.replace(year=start.year + 1, month=1) if start.month == 12 else start.replace(month=start.month + 1)
+
+    income = await session.execute(select(func.coalesce(func.sum(Income.amount), 0)).where(
+        Income.user_id == user_id, Income.created_at >= start, Income.created_at < end))
+    expenses = await session.execute(select(func.coalesce(func.sum(Expense.amount), 0)).where(
+        Expense.user_id == user_id, Expense.created_at >= start, Expense.created_at < end))
+    categories = await session.execute(select(Expense.category_id, func.sum(Expense.amount)).where(
+        Expense.user_id == user_id, Expense.created_at >= start, Expense.created_at < end
+    ).group_by(Expense.category_id))
+    return income.scalar(), expenses.scalar(), dict(categories.all())
+
+
+async def seed(session, rows: int, month: datetime):
+    start = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    category_ids = [await category_registry.get_id(EXPENSE, label) for label in CATEGORIES]
+    salary_id = await category_registry.get_id(INCOME, "💼 Зарплата")
+    expenses = [
+        {'user_id': BENCH_USER_ID, 'amount': random.randint(100, 500_000),
+         'category_id': random.choice(category_ids),
+         'created_at': start.replace(day=random.randint(1, 28), hour=random.randint(0, 23))}
+        for _ in range(rows)
+    ]
+    incomes = [
+        {'user_id': BENCH_USER_ID, 'amount': random.randint(1_000_000, 20_000_000),
+         'source_id': salary_id, 'created_at': start.replace(day=random.randint(1, 28))}
+        for _ in range(max(rows // 20, 1))
+    ]
+    await session.execute(insert(Expense), expenses)
+    await session.execute(insert(Income), incomes)
+    await session.commit()
+    await rebuild_monthly_rollup(session, BENCH_USER_ID)
+
+
+async def cleanup(session):
+    for model in (Expense, Income, MonthlyRollup):
+        await session.execute(delete(model).where(model.user_id == BENCH_USER_ID))
+    await session.commit()
+
+
+async def measure(name: str, call, repeats: int):
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        await call()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    timings.sort()
+    p50 = statistics.median(timings)
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    print(f"{name:<32} p50 {p50:8.2f} мс   p99 {p99:8.2f} мс")
+
+
+async def main(rows: int, repeats: int):
+    month = datetime.now()
+    # Кэш отчётов спрятал бы стоимость запроса: все повторы после первого были бы попаданиями
+    report_cache.max_size = 0
+
+    async with AsyncSessionLocal() as session:
+        await cleanup(session)
+        await seed(session, rows, month)
+        try:
+            print(f"📊 {rows} расходов за месяц, {repeats} повторов")
+            await measure("3 запроса по сырым таблицам",
+                          lambda: legacy_monthly_statistics(BENCH_USER_ID, session, month), repeats)
+            await measure("1 запрос по агрегатам (ROLLUP)",
+                          lambda: get_monthly_statistics(BENCH_USER_ID, session, month), repeats)
+        finally:
+            await cleanup(session)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    asyncio.run(main(rows, repeats))
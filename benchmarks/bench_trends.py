@@ -0,0 +1,47 @@
+"""Отчёт за 24 месяца: 24 вызова get_monthly_statistics против одного оконного запроса.
+
+Запуск: python -m benchmarks.bench_trends [операций_в_месяц] [повторов]
+"""
+import asyncio
+import sys
+from datetime import datetime
+
+from benchmarks.bench_statistics import BENCH_USER_ID, cleanup, measure, seed
+from database.base import AsyncSessionLocal
+from services.finance_calculations import get_monthly_statistics
+from services.periods import add_months
+from services.report_cache import report_cache
+from services.trends import get_period_report
+
+MONTHS = 24
+
+
+async def per_month_calls(session, start: datetime):
+    for i in range(MONTHS):
+        await get_monthly_statistics(BENCH_USER_ID, session, add_months(start, i))
+
+
+async def main(rows_per_month: int, repeats: int):
+    this_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    start = add_months(this_month, 1 - MONTHS)
+    end = add_months(this_month, 1)
+
+    # Кэш отчётов спрятал бы стоимость запросов
+    report_cache.max_size = 0
+
+    async with AsyncSessionLocal() as session:
+        await cleanup(session)
+        for i in range(MONTHS):
+            await seed(session, rows_per_month, add_months(start, i))
+        try:
+            print(f"📊 {MONTHS} месяцев по {rows_per_month} расходов, {repeats} повторов")
+            await measure(f"{MONTHS} x get_monthly_statistics", lambda: per_month_calls(session, start), repeats)
+            await measure("1 оконный запрос", lambda: get_period_report(BENCH_USER_ID, session, start, end), repeats)
+        finally:
+            await cleanup(session)
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    asyncio.run(main(rows, repeats))
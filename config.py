@@ -10,6 +10,69 @@ class Settings(BaseSettings):
     BOT_TOKEN: str
     POSTGRES_URL: str
 
+    # Сколько telegram_id держать в памяти, чтобы не проверять users на каждое сообщение
+    KNOWN_USERS_CACHE_SIZE: int = 100_000
+
+    # Пул соединений с базой
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+
+    # Режим получения апдейтов: "polling", "webhook" или "sharded"
+    # (long polling в супервизоре + SHARD_WORKERS процессов-обработчиков)
+    BOT_MODE: str = "polling"
+    WEBHOOK_BASE_URL: str = ""  # публичный https-адрес, например https://bot.example.com
+    WEBHOOK_PATH: str = "/webhook"
+    WEBHOOK_SECRET: str = ""
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_WORKERS: int = 1
+    SHARD_WORKERS: int = 4
+    SHARD_QUEUE_SIZE: int = 1000
+
+    # Состояния FSM в Postgres
+    FSM_TTL_SECONDS: int = 86400
+    FSM_CACHE_SIZE: int = 1000
+
+    # Отложенная пакетная запись операций (write-behind)
+    WRITE_BEHIND_ENABLED: bool = False
+    WRITE_BEHIND_BATCH_SIZE: int = 500
+    WRITE_BEHIND_FLUSH_INTERVAL: float = 0.5
+
+    # Кэш статистики и текстов отчётов
+    REPORT_CACHE_SIZE: int = 10000
+    REPORT_CACHE_TTL: int = 300
+
+    # Графики: процессы для рисования и сколько картинок/file_id держать в памяти
+    CHART_WORKERS: int = 2
+    CHART_CACHE_SIZE: int = 1000
+
+    # Классификатор категорий: скольким пользователям держать выученные слова и по скольким расходам учиться
+    CLASSIFIER_CACHE_SIZE: int = 10000
+    CLASSIFIER_HISTORY_SIZE: int = 500
+
+    # Адрес Bot API (пусто - api.telegram.org); для тестов - локальный фейковый сервер
+    TELEGRAM_API_URL: str = ""
+    # Лимиты Telegram на отправку: всего в секунду и в один чат в секунду
+    TELEGRAM_GLOBAL_RATE: float = 25
+    TELEGRAM_CHAT_RATE: float = 1
+    # Сколько ответов подряд можно отправить в один чат без ожидания
+    TELEGRAM_CHAT_BURST: float = 3
+
+    # Метрики в формате Prometheus: GET /metrics. Каждый процесс слушает свой порт:
+    # супервизор/polling - METRICS_PORT, вебхук-воркер i - METRICS_PORT + i, шард i - METRICS_PORT + 1 + i
+    METRICS_ENABLED: bool = True
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9300
+
+    # Рассылка отчёта за прошлый месяц 1-го числа в DIGEST_HOUR часов
+    DIGEST_ENABLED: bool = True
+    DIGEST_HOUR: int = 10
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -20,4 +83,7 @@ settings = Settings()
 
 
 if not settings.BOT_TOKEN:
-    raise ValueError("BOT_TOKEN не установлен в .env файле!")
\ No newline at end of file
+    raise ValueError("BOT_TOKEN не установлен в .env файле!")
+
+if settings.BOT_MODE not in ("polling", "webhook", "sharded"):
+    raise ValueError("BOT_MODE должен быть 'polling', 'webhook' или 'sharded'")
\ No newline at end of file
@@ -1,12 +1,15 @@
-import asyncio
-from database.base import engine, Base
-from database.models import User, Expense, Income
+from pathlib import Path
 
-async def create_tables():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)  # Удаляем всё старое
-        await conn.run_sync(Base.metadata.create_all)  # Создаём новое
-    print("✅ Таблицы созданы напрямую через SQLAlchemy!")
+from alembic import command
+from alembic.config import Config
+
+
+def create_tables():
+    # Схема ведётся миграциями Alembic: upgrade применяет только новые
+    # ревизии и не удаляет существующие данные
+    config = Config(str(Path(__file__).parent / "alembic.ini"))
+    command.upgrade(config, "head")
+    print("✅ Миграции применены (alembic upgrade head)!")
 
 if __name__ == "__main__":
-    asyncio.run(create_tables())
\ No newline at end of file
+    create_tables()
@@ -1,13 +1,54 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import DeclarativeBase
 from config import settings
+from services import metrics
+from .pool import InstrumentedPool
 
 class Base(DeclarativeBase):
     pass
 
-engine = create_async_engine(settings.POSTGRES_URL)
+engine = create_async_engine(
+    settings.POSTGRES_URL,
+    poolclass=InstrumentedPool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    connect_args={
+        # Кэш подготовленных запросов: свой у asyncpg и у адаптера SQLAlchemy
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE
+    }
+)
+# Время каждого запроса по отпечатку SQL - в гистограммы /metrics
+event.listen(engine.sync_engine, "before_cursor_execute", metrics.before_cursor_execute)
+event.listen(engine.sync_engine, "after_cursor_execute", metrics.after_cursor_execute)
+
 AsyncSessionLocal = async_sessionmaker(
     engine,
     class_=AsyncSession,
     expire_on_commit=False
-)
\ No newline at end of file
+)
+
+class LazySession:
+    """Прокси над AsyncSession: сессия (и соединение из пула) создаётся при первом обращении"""
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self._session_factory = session_factory
+        self._session = None
+
+    @property
+    def is_active(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name):
+        if self._session is None:
+            self._session = self._session_factory()
+        return getattr(self._session, name)
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Mapping, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+from sqlalchemy import case, delete, literal_column, null, select
+from sqlalchemy.dialects.postgresql import insert
+
+from .base import AsyncSessionLocal
+from .models import FsmState
+
+logger = logging.getLogger(__name__)
+
+
+class PostgresStorage(BaseStorage):
+    """Хранилище FSM в таблице fsm_states.
+
+    Запись сквозная: каждое изменение сразу уходит в базу, а последние значения
+    держатся в небольшом LRU-кэше процесса. Кэш корректен, только если апдейты
+    одного пользователя всегда обрабатывает один и тот же процесс - иначе его
+    нужно выключить (cache_size=0). Просроченные записи удаляются пачками в фоне.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        ttl: int = 86400,
+        cache_size: int = 1000,
+        cleanup_interval: int = 300,
+        cleanup_batch: int = 1000
+    ):
+        self.session_factory = session_factory
+        self.ttl = timedelta(seconds=ttl)
+        self.cache_size = cache_size
+        self.cleanup_interval = cleanup_interval
+        self.cleanup_batch = cleanup_batch
+        self.key_builder = DefaultKeyBuilder(with_destiny=True)
+        self._cache = OrderedDict()  # key -> (state, data, monotonic expires)
+        self._cleanup_task = None
+
+    # --- кэш ---
+
+    def _cache_get(self, key: str):
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[2] < time.monotonic():
+            del self._cache[key]
+            return None
+        self._cache.move_to_end(key)
+        return entry
+
+    def _cache_put(self, key: str, state: Optional[str], data: Dict[str, Any]):
+        if self.cache_size <= 0:
+            return
+        self._cache[key] = (state, data, time.monotonic() + self.ttl.total_seconds())
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    # --- база ---
+
+    def _ensure_cleanup_task(self):
+        if self._cleanup_task is None:
+            self._cleanup_task = asyncio.create_task(self._cleanup_loop())
+
+    async def _load(self, key: str):
+        entry = self._cache_get(key)
+        if entry is not None:
+            return entry[0], entry[1]
+
+        self._ensure_cleanup_task()
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(FsmState.state, FsmState.data).where(
+                    FsmState.key == key,
+                    FsmState.expires_at > datetime.now(timezone.utc)
+                )
+            )
+            row = result.one_or_none()
+
+        state, data = (row.state, row.data) if row else (None, {})
+        self._cache_put(key, state, data)
+        return state, data
+
+    async def _save(self, key: str, **values):
+        """Записать state или data одним upsert и положить итоговую пару (state, data) в кэш"""
+        self._ensure_cleanup_task()
+        now = datetime.now(timezone.utc)
+        expired = FsmState.expires_at < now
+
+        # Вторая колонка берётся из существующей строки, если та ещё не просрочена
+        update = dict(values, expires_at=now + self.ttl)
+        if 'state' not in values:
+            update['state'] = case((expired, null()), else_=FsmState.state)
+        if 'data' not in values:
+            # Литерал в SQL, а не параметр: JSONB-параметр из '{}' сериализуется в строку "{}"
+            update['data'] = case((expired, literal_column("'{}'::jsonb")), else_=FsmState.data)
+
+        stmt = insert(FsmState).values(key=key, expires_at=now + self.ttl, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FsmState.key], set_=update
+        ).returning(FsmState.state, FsmState.data)
+
+        async with self.session_factory() as session:
+            result = await session.execute(stmt)
+            row = result.one()
+            await session.commit()
+
+        self._cache_put(key, row.state, row.data)
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                await self.cleanup()
+            except Exception:
+                logger.exception("Не удалось очистить просроченные состояния FSM")
+
+    async def cleanup(self) -> int:
+        """Удалить просроченные и пустые состояния пачками по cleanup_batch строк"""
+        removed = 0
+        while True:
+            expired = select(FsmState.key).where(
+                (FsmState.expires_at < datetime.now(timezone.utc))
+                | (FsmState.state.is_(None) & (FsmState.data == {}))
+            ).limit(self.cleanup_batch)
+
+            async with self.session_factory() as session:
+                result = await session.execute(delete(FsmState).where(FsmState.key.in_(expired)))
+                await session.commit()
+
+            removed += result.rowcount
+            if result.rowcount < self.cleanup_batch:
+                return removed
+
+    # --- интерфейс BaseStorage ---
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state_name = state.state if isinstance(state, State) else state
+        await self._save(self.key_builder.build(key), state=state_name)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._load(self.key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._save(self.key_builder.build(key), data=dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._load(self.key_builder.build(key))
+        return dict(data)
+
+    async def close(self) -> None:
+        if self._cleanup_task is not None:
+            self._cleanup_task.cancel()
+            self._cleanup_task = None
+        self._cache.clear()
@@ -1,4 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, BigInteger, Text
+from sqlalchemy import (
+    Column, Integer, SmallInteger, String, Date, DateTime, BigInteger, Text, Index,
+    ForeignKey, Identity, UniqueConstraint
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.sql import func
 from .base import Base
 
@@ -12,21 +16,82 @@ class User(Base):
     first_name = Column(String(100))
     joined_at = Column(DateTime(timezone=True), server_default=func.now())
 
+class Category(Base):
+    """Справочник категорий расходов и источников доходов: в операциях хранится только SMALLINT id"""
+    __tablename__ = "categories"
+
+    id = Column(SmallInteger, Identity(), primary_key=True)
+    kind = Column(String(10), nullable=False)  # 'expense' или 'income'
+    label = Column(String(100), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("kind", "label", name="uq_categories_kind_label"),
+    )
+
 class Expense(Base):
     __tablename__ = "expenses"
 
     id = Column(Integer, primary_key=True)
-    amount = Column(Float, nullable=False)
-    category = Column(String(50), nullable=False)
+    amount = Column(BigInteger, nullable=False)  # в копейках
+    category_id = Column(SmallInteger, ForeignKey("categories.id"), nullable=False)
     description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     user_id = Column(BigInteger, nullable=False)
 
+    __table_args__ = (
+        Index(
+            "ix_expenses_user_id_created_at",
+            "user_id", created_at.desc(),
+            postgresql_include=["amount", "category_id"],
+        ),
+    )
+
 class Income(Base):
     __tablename__ = "incomes"
 
     id = Column(Integer, primary_key=True)
-    amount = Column(Float, nullable=False)
-    source = Column(String(100), default="Основной доход")
+    amount = Column(BigInteger, nullable=False)  # в копейках
+    source_id = Column(SmallInteger, ForeignKey("categories.id"), nullable=False)
+    description = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     user_id = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        Index(
+            "ix_incomes_user_id_created_at",
+            "user_id", created_at.desc(),
+            postgresql_include=["amount", "source_id"],
+        ),
+    )
+
+class MonthlyRollup(Base):
+    """Агрегаты по месяцам: (пользователь, месяц, тип, категория/источник) -> сумма, количество"""
+    __tablename__ = "monthly_rollups"
+
+    user_id = Column(BigInteger, primary_key=True)
+    month = Column(Date, primary_key=True)
+    kind = Column(String(10), primary_key=True)  # 'expense' или 'income'
+    category_id = Column(SmallInteger, ForeignKey("categories.id"), primary_key=True)
+    total = Column(BigInteger, nullable=False, default=0)  # в копейках
+    operations_count = Column(Integer, nullable=False, default=0)
+
+
+class FsmState(Base):
+    """Состояние FSM aiogram: общее для всех процессов бота и переживает перезапуск"""
+    __tablename__ = "fsm_states"
+
+    key = Column(String(200), primary_key=True)
+    state = Column(String(100))
+    data = Column(JSONB, nullable=False, server_default="{}")
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class DigestRun(Base):
+    """Прогресс рассылки месячного отчёта: по какой telegram_id уже отправлено"""
+    __tablename__ = "digest_runs"
+
+    month = Column(Date, primary_key=True)
+    last_user_id = Column(BigInteger, nullable=False, default=0)
+    sent = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+
+# Ожидание соединения дольше этого порога попадает в лог
+SLOW_CHECKOUT_SECONDS = 0.1
+
+
+class PoolStats:
+    """Счётчики пула: сколько ждали соединение, сколько занято и сколько сверх pool_size"""
+
+    def __init__(self, window: int = 1000):
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits = deque(maxlen=window)
+        self.pool = None
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.total_wait += seconds
+        self.max_wait = max(self.max_wait, seconds)
+        self.recent_waits.append(seconds)
+        if seconds >= SLOW_CHECKOUT_SECONDS:
+            self.slow_checkouts += 1
+            logger.warning("Ожидание соединения из пула: %.3f с (занято %s)", seconds, self.in_use)
+
+    @property
+    def in_use(self) -> int:
+        return self.pool.checkedout() if self.pool is not None else 0
+
+    @property
+    def overflow(self) -> int:
+        # overflow() отрицателен, пока не открыты все pool_size соединений
+        return max(self.pool.overflow(), 0) if self.pool is not None else 0
+
+    def snapshot(self) -> dict:
+        waits = sorted(self.recent_waits)
+        return {
+            'checkouts': self.checkouts,
+            'slow_checkouts': self.slow_checkouts,
+            'avg_wait': self.total_wait / self.checkouts if self.checkouts else 0.0,
+            'p99_wait': waits[min(len(waits) - 1, int(len(waits) * 0.99))] if waits else 0.0,
+            'max_wait': self.max_wait,
+            'in_use': self.in_use,
+            'overflow': self.overflow
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Очередь соединений, которая замеряет время ожидания свободного соединения"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # recreate() при dispose() тоже проходит через __init__
+        pool_stats.pool = self
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_stats.record_wait(time.perf_counter() - started)
+
+
+async def warm_up_pool(engine, connections: int):
+    """Открыть минимальное число соединений заранее, до начала приёма апдейтов"""
+    opened = await asyncio.gather(*(engine.connect() for _ in range(connections)))
+    for connection in opened:
+        await connection.close()
+    logger.info("Пул БД прогрет: %s соединений", connections)
@@ -4,6 +4,8 @@ from .expenses import router as expenses_router
 from .incomes import router as incomes_router
 from .statistics import router as statistics_router
 from .delete import router as delete_router
+from .imports import router as imports_router
+from .export import router as export_router
 
 router = Router()
 router.include_router(start_router)
@@ -11,5 +13,7 @@ router.include_router(expenses_router)
 router.include_router(incomes_router)
 router.include_router(statistics_router)
 router.include_router(delete_router)  # Добавляем роутер удаления
+router.include_router(imports_router)
+router.include_router(export_router)
 
 __all__ = ["router"]
\ No newline at end of file
@@ -4,9 +4,15 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select
 
 from database.models import Expense, Income
+from services.categories import category_registry
+from services.ledger import get_last_operations
+from services.money import format_money
+from services.report_cache import report_cache
+from services.rollup import EXPENSE, remove_from_rollup
+from keyboards.labels import CANCEL, DELETE_OPERATION
 from keyboards.main_menu import get_main_keyboard
 from keyboards.cancel import get_cancel_keyboard
 
@@ -19,11 +25,10 @@ class DeleteOperation(StatesGroup):
 
 
 @router.message(Command("delete"))
-@router.message(F.text == "🗑️ Удалить операцию")
+@router.message(F.text == DELETE_OPERATION)
 async def start_delete(message: Message, state: FSMContext, session: AsyncSession):
     await message.answer(
-        "🗑️ <b>Удаление операции</b>\n\n"
-        "📋 Последние 5 операций:\n",
+        "🗑️ <b>Удаление операции</b>",
         reply_markup=get_cancel_keyboard(),
         parse_mode="HTML"
     )
@@ -33,31 +38,19 @@ async def start_delete(message: Message, state: FSMContext, session: AsyncSessio
 
 
 async def show_last_for_delete(message: Message, session: AsyncSession, state: FSMContext):
-    expenses_stmt = select(Expense).where(
-        Expense.user_id == message.from_user.id
-    ).order_by(desc(Expense.created_at)).limit(5)
-
-    expenses_result = await session.execute(expenses_stmt)
-    last_expenses = expenses_result.scalars().all()
-
-    incomes_stmt = select(Income).where(
-        Income.user_id == message.from_user.id
-    ).order_by(desc(Income.created_at)).limit(5)
-
-    incomes_result = await session.execute(incomes_stmt)
-    last_incomes = incomes_result.scalars().all()
+    operations = await get_last_operations(message.from_user.id, session)
 
     operations_text = ""
     operations_data = []
 
-    for i, expense in enumerate(last_expenses, 1):
-        desc_text = f" - {expense.description}" if expense.description else ""
-        operations_text += f"{i}. 📤 {expense.amount:,.2f} ₽ - {expense.category}{desc_text}\n"
-        operations_data.append(('expense', expense.id))
-
-    for i, income in enumerate(last_incomes, len(last_expenses) + 1):
-        operations_text += f"{i}. 💰 {income.amount:,.2f} ₽ - {income.source}\n"
-        operations_data.append(('income', income.id))
+    # Нумерация совпадает с /last: новые операции сверху
+    for i, op in enumerate(operations, 1):
+        if op.kind == EXPENSE:
+            desc_text = f" - {op.description}" if op.description else ""
+            operations_text += f"{i}. 📤 {format_money(op.amount)} ₽ - {op.label}{desc_text}\n"
+        else:
+            operations_text += f"{i}. 💰 {format_money(op.amount)} ₽ - {op.label}\n"
+        operations_data.append((op.kind, op.id))
 
     await state.update_data(operations_list=operations_data)
 
@@ -80,7 +73,7 @@ async def show_last_for_delete(message: Message, session: AsyncSession, state: F
         )
 
 
-@router.message(DeleteOperation.choosing_type, F.text == "❌ Отмена")
+@router.message(DeleteOperation.choosing_type, F.text == CANCEL, flags={"db": False})
 async def cancel_delete(message: Message, state: FSMContext):
     await state.clear()
     await message.answer(
@@ -91,7 +84,7 @@ async def cancel_delete(message: Message, state: FSMContext):
 
 @router.message(DeleteOperation.choosing_type, F.text)
 async def process_delete_choice(message: Message, state: FSMContext, session: AsyncSession):
-    if message.text == "❌ Отмена":
+    if message.text == CANCEL:
         await cancel_delete(message, state)
         return
 
@@ -130,10 +123,13 @@ async def process_delete_choice(message: Message, state: FSMContext, session: As
         )
 
         if op_type == 'expense':
+            await category_registry.resolve(session, [operation.category_id])
             desc_text = f" - {operation.description}" if operation.description else ""
-            op_text = f"📤 {operation.amount:,.2f} ₽ - {operation.category}{desc_text}"
+            label = category_registry.label(operation.category_id)
+            op_text = f"📤 {format_money(operation.amount)} ₽ - {label}{desc_text}"
         else:
-            op_text = f"💰 {operation.amount:,.2f} ₽ - {operation.source}"
+            await category_registry.resolve(session, [operation.source_id])
+            op_text = f"💰 {format_money(operation.amount)} ₽ - {category_registry.label(operation.source_id)}"
 
         await message.answer(
             f"❓ <b>Подтвердите удаление:</b>\n\n"
@@ -145,12 +141,12 @@ async def process_delete_choice(message: Message, state: FSMContext, session: As
         await state.set_state(DeleteOperation.confirming_delete)
 
     except ValueError:
-        await message.answer("❌ Введите цифру от 1 до 10:")
+        await message.answer("❌ Введите номер операции из списка:")
 
 
 @router.message(DeleteOperation.confirming_delete, F.text)
 async def confirm_delete(message: Message, state: FSMContext, session: AsyncSession):
-    if message.text == "❌ Отмена":
+    if message.text == CANCEL:
         await cancel_delete(message, state)
         return
 
@@ -173,8 +169,10 @@ async def confirm_delete(message: Message, state: FSMContext, session: AsyncSess
         operation = result.scalar_one_or_none()
 
         if operation:
+            await remove_from_rollup(session, operation)
             await session.delete(operation)
             await session.commit()
+            report_cache.invalidate(message.from_user.id)
 
             await message.answer(
                 "✅ Операция успешно удалена!",
@@ -1,12 +1,15 @@
-from aiogram import Router, F
-from aiogram.filters import Command, StateFilter
+from aiogram import Router, F, html
+from aiogram.filters import Command, CommandObject, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, ReplyKeyboardRemove
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from database.models import Expense, User
+from services.classifier import category_classifier
+from services.money import format_money
+from services.operations import save_expense, save_expenses
+from services.parsing import AmountError, parse_amount, parse_entries
+from keyboards.labels import ADD_EXPENSE, CANCEL, EXPENSE_CATEGORIES, SKIP
 from keyboards.categories import get_categories_keyboard
 from keyboards.description import get_description_keyboard
 from keyboards.main_menu import get_main_keyboard
@@ -21,7 +24,7 @@ class AddExpense(StatesGroup):
     description = State()
 
 
-@router.message(F.text == "📥 Добавить расход")
+@router.message(F.text == ADD_EXPENSE, flags={"db": False})
 async def start_add_expense(message: Message, state: FSMContext):
     await message.answer(
         "💸 Введите сумму расхода (только цифры):",
@@ -31,7 +34,7 @@ async def start_add_expense(message: Message, state: FSMContext):
 
 
 # Обработка отмены на любом этапе
-@router.message(StateFilter(AddExpense), F.text == "❌ Отмена")
+@router.message(StateFilter(AddExpense), F.text == CANCEL, flags={"db": False})
 async def cancel_expense(message: Message, state: FSMContext):
     await state.clear()
     await message.answer(
@@ -40,37 +43,15 @@ async def cancel_expense(message: Message, state: FSMContext):
     )
 
 
-@router.message(AddExpense.amount, F.text != "❌ Отмена")
+@router.message(AddExpense.amount, F.text != CANCEL, flags={"db": False})
 async def process_amount(message: Message, state: FSMContext):
 
 
-    user_input = message.text.strip()
-    cleaned = user_input.replace(' ', '').replace(',', '.')
-
-    if cleaned.count('.') > 1:
-        parts = cleaned.split('.')
-        cleaned = parts[0] + '.' + ''.join(parts[1:])
-
     try:
-        amount = float(cleaned)
-
-        if amount <= 0:
-            await message.answer("❌ Сумма должна быть больше 0. Попробуйте еще раз:",
-                                 reply_markup=get_cancel_keyboard())
-            return
-
-        if amount > 1_000_000_000:
-            await message.answer("❌ Слишком большая сумма. Попробуйте еще раз:", reply_markup=get_cancel_keyboard())
-            return
-
-        await state.update_data(amount=amount)
-
-        await message.answer(
-            "📂 Выберите категорию:",
-            reply_markup=get_categories_keyboard()
-        )
-        await state.set_state(AddExpense.category)
-
+        amount = parse_amount(message.text)
+    except AmountError as e:
+        await message.answer(f"{e} Попробуйте еще раз:", reply_markup=get_cancel_keyboard())
+        return
     except ValueError:
         await message.answer(
             "❌ Не могу распознать число. Примеры правильного ввода:\n"
@@ -78,18 +59,25 @@ async def process_amount(message: Message, state: FSMContext):
             "Попробуйте еще раз:",
             reply_markup=get_cancel_keyboard()
         )
+        return
 
+    await state.update_data(amount=amount)
 
-@router.message(AddExpense.category, F.text != "❌ Отмена")
+    await message.answer(
+        "📂 Выберите категорию:",
+        reply_markup=get_categories_keyboard()
+    )
+    await state.set_state(AddExpense.category)
+
+
+@router.message(AddExpense.category, F.text != CANCEL, flags={"db": False})
 async def process_category(message: Message, state: FSMContext):
 
 
-    # Проверяем, что выбранная категория есть в списке
+    # Проверяем, что выбранная категория есть в списке - том же, из которого собрана клавиатура
     category_text = message.text
-    valid_categories = ["🏠 Жилье", "🍎 Продукты", "🚗 Транспорт", "💊 Здоровье",
-                        "🎮 Развлечения", "🛍️ Покупки", "✈️ Путешествия", "📚 Образование", "💳 Кредит", "💾 Прочее"]
 
-    if category_text not in valid_categories:
+    if category_text not in EXPENSE_CATEGORIES:
         await message.answer("❌ Пожалуйста, выберите категорию из списка:", reply_markup=get_categories_keyboard())
         return
 
@@ -97,7 +85,7 @@ async def process_category(message: Message, state: FSMContext):
     data = await state.get_data()
 
     await message.answer(
-        f"💰 Сумма: {data['amount']} ₽\n"
+        f"💰 Сумма: {format_money(data['amount'])} ₽\n"
         f"📂 Категория: {category_text}\n\n"
         "✏️ Введите описание (или нажмите 'Пропустить'):",
         reply_markup=get_description_keyboard()
@@ -105,136 +93,114 @@ async def process_category(message: Message, state: FSMContext):
     await state.set_state(AddExpense.description)
 
 
-@router.message(AddExpense.description, F.text != "❌ Отмена")
+@router.message(AddExpense.description, F.text != CANCEL)
 async def process_description(message: Message, state: FSMContext, session: AsyncSession):
 
     data = await state.get_data()
     description_text = message.text
 
     # Если пользователь ввел "Пропустить", то описание будет None
-    if description_text == "Пропустить":
+    if description_text == SKIP:
         description_text = None
 
-    # Проверяем и создаем пользователя если нужно
-    stmt = select(User).where(User.telegram_id == message.from_user.id)
-    result = await session.execute(stmt)
-    user = result.scalar_one_or_none()
-
-    if not user:
-        user = User(
-            telegram_id=message.from_user.id,
-            username=message.from_user.username,
-            first_name=message.from_user.first_name
-        )
-        session.add(user)
-        await session.commit()
-
-    # Создаем запись о расходе
-    expense = Expense(
+    await save_expense(
+        session, message.from_user,
         amount=data['amount'],
         category=data['category'],
-        description=description_text,
-        user_id=message.from_user.id
+        description=description_text
     )
 
-    session.add(expense)
-    await session.commit()
-
     # Завершаем FSM
     await state.clear()
 
     await message.answer(
         f"✅ Расход успешно добавлен!\n"
-        f"💸 {data['amount']} ₽ - {data['category']}\n"
+        f"💸 {format_money(data['amount'])} ₽ - {data['category']}\n"
         f"📝 {description_text if description_text else 'Без описания'}",
         reply_markup=get_main_keyboard()
     )
 
 
-# Быстрое добавление расхода командой /spent
-@router.message(Command("spent"))
-async def quick_add_expense(message: Message, session: AsyncSession):
-    """Быстрое добавление расхода: /spent 500 такси"""
+SPENT_HELP = (
+    "💸 <b>Формат быстрой команды:</b>\n"
+    "<code>/spent [сумма] [категория] (описание)</code>\n\n"
+    "📝 <b>Примеры:</b>\n"
+    "<code>/spent 500 такси</code>\n"
+    "<code>/spent 300 еда продукты на неделю</code>\n"
+    "<code>/spent 1000 кино с друзьями</code>\n\n"
+    "📋 Несколько расходов - по одному на строку, можно и без /spent:\n"
+    "<code>500 такси\n300 еда обед\n1200 кафе</code>"
+)
+
+
+def batch_entries(message: Message):
+    """Фильтр для сообщения без команды: все строки - расходы вида «500 такси»"""
     try:
-        parts = message.text.split(' ', 2)
-        if len(parts) < 3:
-            await message.answer(
-                "💸 <b>Формат быстрой команды:</b>\n"
-                "<code>/spent [сумма] [категория] (описание)</code>\n\n"
-                "📝 <b>Примеры:</b>\n"
-                "<code>/spent 500 такси</code>\n"
-                "<code>/spent 300 еда продукты на неделю</code>\n"
-                "<code>/spent 1000 кино с друзьями</code>",
-                parse_mode="HTML"
-            )
-            return
-
-        amount = float(parts[1].replace(',', '.'))
-        category_text = parts[2].lower()
-
-        # Автоматическое определение категории
-        category_map = {
-            'еда': '🍎 Продукты',
-            'продукты': '🍎 Продукты',
-            'такси': '🚗 Транспорт',
-            'транспорт': '🚗 Транспорт',
-            'бензин': '🚗 Транспорт',
-            'метро': '🚗 Транспорт',
-            'кино': '🎮 Развлечения',
-            'развлечения': '🎮 Развлечения',
-            'кафе': '🎮 Развлечения',
-            'ресторан': '🎮 Развлечения',
-            'кофе': '🎮 Развлечения',
-            'магазин': '🛍️ Покупки',
-            'покупки': '🛍️ Покупки',
-            'одежда': '🛍️ Покупки',
-            'здоровье': '💊 Здоровье',
-            'лекарства': '💊 Здоровье',
-            'врач': '💊 Здоровье',
-            'жилье': '🏠 Жилье',
-            'коммуналка': '🏠 Жилье',
-            'аренда': '🏠 Жилье',
-            'ипотека': '🏠 Жилье',
-            'кредит': '💳 Кредит',
-            'долг': '💳 Кредит',
-            'заем': '💳 Кредит'
-        }
-
-        category = category_map.get(category_text, f"💾 {category_text.title()}")
-        description = parts[3] if len(parts) > 3 else None
-
-        stmt = select(User).where(User.telegram_id == message.from_user.id)
-        result = await session.execute(stmt)
-        user = result.scalar_one_or_none()
-
-        if not user:
-            user = User(
-                telegram_id=message.from_user.id,
-                username=message.from_user.username,
-                first_name=message.from_user.first_name
-            )
-            session.add(user)
-            await session.commit()
-
-        # Создаем запись о расходе
-        expense = Expense(
-            amount=amount,
-            category=category,
-            description=description,
-            user_id=message.from_user.id
-        )
+        entries, errors = parse_entries(message.text or "")
+    except ValueError:
+        return False
+    return bool(entries) and not errors
+
 
-        session.add(expense)
-        await session.commit()
+async def save_and_confirm(message: Message, session: AsyncSession, entries: list):
+    """Одна транзакция на всю пачку и один ответ со списком"""
+    await save_expenses(session, message.from_user, entries)
 
+    if len(entries) == 1:
+        entry = entries[0]
         await message.answer(
             f"✅ <b>Расход добавлен!</b>\n"
-            f"💸 {amount:,.2f} ₽ - {category}\n"
-            f"📝 {description if description else 'Без описания'}",
+            f"💸 {format_money(entry.amount)} ₽ - {entry.category}\n"
+            f"📝 {entry.description if entry.description else 'Без описания'}",
             parse_mode="HTML"
         )
+        return
 
-    except ValueError:
-        await message.answer("❌ Ошибка в сумме. Пример: <code>/spent 500 такси</code>", parse_mode="HTML")
-    except Exception as e:
-        await message.answer(f"❌ Ошибка: {e}")
\ No newline at end of file
+    lines = "\n".join(
+        f"💸 {format_money(entry.amount)} ₽ - {entry.category}"
+        + (f" ({entry.description})" if entry.description else "")
+        for entry in entries
+    )
+    total = sum(entry.amount for entry in entries)
+    await message.answer(
+        f"✅ <b>Добавлено расходов: {len(entries)}</b>\n{lines}\n\n"
+        f"📤 <b>Итого:</b> {format_money(total)} ₽",
+        parse_mode="HTML"
+    )
+
+
+# Быстрое добавление расхода командой /spent (одна или несколько строк)
+@router.message(Command("spent"))
+async def quick_add_expense(message: Message, session: AsyncSession, command: CommandObject):
+    """Быстрое добавление расхода: /spent 500 такси, или по расходу на строку"""
+    if not command.args:
+        await message.answer(SPENT_HELP, parse_mode="HTML")
+        return
+
+    classify = await category_classifier.for_user(session, message.from_user.id)
+    try:
+        entries, errors = parse_entries(command.args, classify)
+    except ValueError as e:
+        await message.answer(f"❌ Слишком много строк: {e}")
+        return
+
+    if errors:
+        # Пачка записывается целиком или никак - иначе неясно, что добавилось
+        bad_lines = "\n".join(f"• <code>{html.quote(line)}</code>" for line in errors)
+        await message.answer(
+            f"❌ Не удалось разобрать строки:\n{bad_lines}\n\n"
+            "Ничего не добавлено. Пример: <code>/spent 500 такси</code>",
+            parse_mode="HTML"
+        )
+        return
+
+    await save_and_confirm(message, session, entries)
+
+
+# Свободный ввод: сообщение из строк «сумма категория описание» без команды и вне диалогов
+@router.message(StateFilter(None), F.text, batch_entries)
+async def free_text_expenses(message: Message, session: AsyncSession):
+    # Фильтр проверил разбор словарём; категории уточняем с учётом выученного для пользователя
+    classify = await category_classifier.for_user(session, message.from_user.id)
+    entries, _ = parse_entries(message.text, classify)
+    await save_and_confirm(message, session, entries)
@@ -0,0 +1,54 @@
+import os
+
+from aiogram import Router
+from aiogram.filters import Command, CommandObject
+from aiogram.types import FSInputFile, Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.exporter import export_operations
+from services.periods import parse_period
+
+router = Router()
+
+
+@router.message(Command("export"), flags={"coalesce": False})
+async def export_history(message: Message, command: CommandObject, session: AsyncSession):
+    """Выгрузка операций: /export [период] [xlsx]"""
+    file_format = "csv"
+    start = end = None
+
+    for arg in (command.args or "").split():
+        if arg.lower() in ("csv", "xlsx"):
+            file_format = arg.lower()
+            continue
+
+        period = parse_period(arg)
+        if period is None:
+            await message.answer(
+                "📤 <b>Формат команды:</b>\n"
+                "<code>/export [период] [xlsx]</code>\n\n"
+                "📝 <b>Примеры:</b>\n"
+                "<code>/export</code> - вся история в CSV\n"
+                "<code>/export 2025</code>\n"
+                "<code>/export 2025-03 xlsx</code>\n"
+                "<code>/export 2025-01..2025-06</code>",
+                parse_mode="HTML"
+            )
+            return
+        start, end = period
+
+    progress = await message.answer("⏳ Готовлю выгрузку...")
+    path, exported = await export_operations(session, message.from_user.id, start, end, file_format)
+
+    try:
+        if not exported:
+            await progress.edit_text("📭 За этот период операций нет")
+            return
+
+        await message.answer_document(
+            FSInputFile(path, filename=f"operations.{file_format}"),
+            caption=f"📤 Операций в выгрузке: {exported:,}"
+        )
+        await progress.delete()
+    finally:
+        os.remove(path)
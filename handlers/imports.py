@@ -0,0 +1,87 @@
+import time
+
+from aiogram import Bot, Router, F
+from aiogram.filters import Command, StateFilter
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Message
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from services.importer import StatementFormatError, import_statement
+from services.report_cache import report_cache
+from services.users import ensure_user
+from keyboards.labels import CANCEL
+from keyboards.main_menu import get_main_keyboard
+from keyboards.cancel import get_cancel_keyboard
+
+router = Router()
+
+# Размер куска при скачивании файла из Telegram
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+PROGRESS_INTERVAL = 2
+
+
+class ImportStatement(StatesGroup):
+    waiting_file = State()
+
+
+@router.message(Command("import"), flags={"db": False})
+async def start_import(message: Message, state: FSMContext):
+    await message.answer(
+        "📥 <b>Импорт выписки</b>\n\n"
+        "Отправьте CSV-файл с колонками <b>Дата</b>, <b>Сумма</b> и, по желанию, "
+        "<b>Категория</b> и <b>Описание</b>.\n"
+        "Отрицательные суммы считаются расходами, положительные - доходами.",
+        parse_mode="HTML",
+        reply_markup=get_cancel_keyboard()
+    )
+    await state.set_state(ImportStatement.waiting_file)
+
+
+@router.message(StateFilter(ImportStatement), F.text == CANCEL, flags={"db": False})
+async def cancel_import(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("❌ Импорт отменён", reply_markup=get_main_keyboard())
+
+
+@router.message(ImportStatement.waiting_file, F.document, flags={"coalesce": False})
+async def process_statement(message: Message, state: FSMContext, session: AsyncSession, bot: Bot):
+    document = message.document
+    if not (document.file_name or "").lower().endswith(".csv"):
+        await message.answer("❌ Нужен файл в формате CSV", reply_markup=get_cancel_keyboard())
+        return
+
+    progress = await message.answer("⏳ Импортирую выписку...")
+    last_update = time.monotonic()
+
+    async def on_progress(imported: int):
+        nonlocal last_update
+        # Не чаще раза в PROGRESS_INTERVAL секунд, чтобы не упереться в лимиты Telegram
+        if time.monotonic() - last_update >= PROGRESS_INTERVAL:
+            last_update = time.monotonic()
+            await progress.edit_text(f"⏳ Импортировано операций: {imported:,}")
+
+    # Файл читается потоком, целиком в память он не загружается
+    file = await bot.get_file(document.file_id)
+    chunks = bot.session.stream_content(
+        bot.session.api.file_url(bot.token, file.file_path),
+        chunk_size=DOWNLOAD_CHUNK_SIZE
+    )
+
+    try:
+        await ensure_user(session, message.from_user)
+        imported = await import_statement(session, message.from_user.id, chunks, on_progress)
+    except StatementFormatError as e:
+        await session.rollback()
+        await progress.edit_text(f"❌ {e}")
+        return
+
+    report_cache.invalidate(message.from_user.id)
+    await state.clear()
+    await progress.edit_text(f"✅ Импорт завершён: {imported:,} операций")
+    await message.answer("📊 Статистика обновлена", reply_markup=get_main_keyboard())
+
+
+@router.message(ImportStatement.waiting_file, flags={"db": False})
+async def waiting_statement(message: Message):
+    await message.answer("📎 Отправьте CSV-файл выписки или нажмите «❌ Отмена»")
@@ -4,9 +4,11 @@ from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import Message, ReplyKeyboardRemove
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 
-from database.models import Income, User
+from services.money import format_money
+from services.operations import save_income
+from services.parsing import AmountError, parse_amount
+from keyboards.labels import ADD_INCOME, CANCEL, INCOME_SOURCES
 from keyboards.income_sources import get_income_sources_keyboard
 from keyboards.main_menu import get_main_keyboard
 from keyboards.cancel import get_cancel_keyboard
@@ -19,7 +21,7 @@ class AddIncome(StatesGroup):
     source = State()
 
 
-@router.message(F.text == "💰 Добавить доход")
+@router.message(F.text == ADD_INCOME, flags={"db": False})
 async def start_add_income(message: Message, state: FSMContext):
     await message.answer(
         "💰 Введите сумму дохода (только цифры):",
@@ -29,7 +31,7 @@ async def start_add_income(message: Message, state: FSMContext):
 
 
 # Обработка отмены на любом этапе
-@router.message(StateFilter(AddIncome), F.text == "❌ Отмена")
+@router.message(StateFilter(AddIncome), F.text == CANCEL, flags={"db": False})
 async def cancel_income(message: Message, state: FSMContext):
     await state.clear()
     await message.answer(
@@ -38,39 +40,17 @@ async def cancel_income(message: Message, state: FSMContext):
     )
 
 
-@router.message(AddIncome.amount, F.text)
+@router.message(AddIncome.amount, F.text, flags={"db": False})
 async def process_income_amount(message: Message, state: FSMContext):
-    if message.text == "❌ Отмена":
+    if message.text == CANCEL:
         await cancel_income(message, state)
         return
 
-    user_input = message.text.strip()
-    cleaned = user_input.replace(' ', '').replace(',', '.')
-
-    if cleaned.count('.') > 1:
-        parts = cleaned.split('.')
-        cleaned = parts[0] + '.' + ''.join(parts[1:])
-
     try:
-        amount = float(cleaned)
-
-        if amount <= 0:
-            await message.answer("❌ Сумма должна быть больше 0. Попробуйте еще раз:",
-                                 reply_markup=get_cancel_keyboard())
-            return
-
-        if amount > 1_000_000_000:
-            await message.answer("❌ Слишком большая сумма. Попробуйте еще раз:", reply_markup=get_cancel_keyboard())
-            return
-
-        await state.update_data(amount=amount)
-
-        await message.answer(
-            "📊 Выберите источник дохода:",
-            reply_markup=get_income_sources_keyboard()
-        )
-        await state.set_state(AddIncome.source)
-
+        amount = parse_amount(message.text)
+    except AmountError as e:
+        await message.answer(f"{e} Попробуйте еще раз:", reply_markup=get_cancel_keyboard())
+        return
     except ValueError:
         await message.answer(
             "❌ Не могу распознать число. Примеры правильного ввода:\n"
@@ -78,46 +58,39 @@ async def process_income_amount(message: Message, state: FSMContext):
             "Попробуйте еще раз:",
             reply_markup=get_cancel_keyboard()
         )
+        return
+
+    await state.update_data(amount=amount)
+
+    await message.answer(
+        "📊 Выберите источник дохода:",
+        reply_markup=get_income_sources_keyboard()
+    )
+    await state.set_state(AddIncome.source)
 
 
 @router.message(AddIncome.source, F.text)
 async def process_income_source(message: Message, state: FSMContext, session: AsyncSession):
-    if message.text == "❌ Отмена":
+    if message.text == CANCEL:
         await cancel_income(message, state)
         return
 
-    data = await state.get_data()
+    # Источник - только из списка: свободный текст завёл бы новую запись в справочнике
     source = message.text
 
-    # Проверяем и создаем пользователя если нужно
-    stmt = select(User).where(User.telegram_id == message.from_user.id)
-    result = await session.execute(stmt)
-    user = result.scalar_one_or_none()
+    if source not in INCOME_SOURCES:
+        await message.answer("❌ Пожалуйста, выберите источник из списка:", reply_markup=get_income_sources_keyboard())
+        return
 
-    if not user:
-        user = User(
-            telegram_id=message.from_user.id,
-            username=message.from_user.username,
-            first_name=message.from_user.first_name
-        )
-        session.add(user)
-        await session.commit()
-
-    # Создаем запись о доходе
-    income = Income(
-        amount=data['amount'],
-        source=source,
-        user_id=message.from_user.id
-    )
+    data = await state.get_data()
 
-    session.add(income)
-    await session.commit()
+    await save_income(session, message.from_user, amount=data['amount'], source=source)
 
     # Завершаем FSM
     await state.clear()
 
     await message.answer(
         f"✅ Доход успешно добавлен!\n"
-        f"💰 {data['amount']} ₽ - {source}",
+        f"💰 {format_money(data['amount'])} ₽ - {source}",
         reply_markup=get_main_keyboard()
     )
\ No newline at end of file
@@ -1,128 +1,144 @@
+from datetime import date, datetime
+
 from aiogram import Router, F
-from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.filters import Command, CommandObject
+from aiogram.types import BufferedInputFile, Message
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
 
+from services.charts import chart_cache, get_chart, render_bars, render_pie
 from services.finance_calculations import get_monthly_statistics, generate_financial_advice
-from database.models import Expense, Income
+from services.ledger import get_last_operations
+from services.money import to_rubles
+from services.periods import add_months, parse_period
+from services.reports import (
+    render_advice, render_last_operations, render_period_report, render_report, split_message
+)
+from services.report_cache import report_cache
+from services.trends import get_period_report
+from keyboards.labels import ADVICE, LAST_OPERATIONS, STATISTICS
 
 router = Router()
 
+# Максимум для формы /report N
+MAX_REPORT_MONTHS = 24
+
 
-@router.message(F.text == "📊 Статистика")
+@router.message(F.text == STATISTICS)
 @router.message(Command("report"))
-async def show_statistics(message: Message, session: AsyncSession):
-    """Показать статистику за текущий месяц"""
-    stats = await get_monthly_statistics(message.from_user.id, session)
+async def show_statistics(message: Message, session: AsyncSession, command: CommandObject = None):
+    """Показать статистику за текущий месяц, а с аргументом - за период"""
+    if command is not None and command.args:
+        await show_period_report(message, session, command.args.strip())
+        return
+
+    month = date.today().replace(day=1)
+
+    # Повторное нажатие без новых операций не трогает базу вовсе
+    report = report_cache.get(message.from_user.id, month, 'report')
+    if report is None:
+        generation = report_cache.generation(message.from_user.id)
+        stats = await get_monthly_statistics(message.from_user.id, session)
+        report = render_report(stats)
+        report_cache.set(message.from_user.id, month, 'report', report, generation)
 
-    total_income = stats['total_income']
-    total_expenses = stats['total_expenses']
+    await message.answer(report, parse_mode="HTML")
 
-    # Формируем текстовый отчёт
-    report = f"📊 <b>Финансовый отчёт за {stats['month']}</b>\n\n"
 
-    report += f"💰 <b>Доходы:</b> {total_income:,.2f} ₽\n"
-    report += f"📤 <b>Расходы:</b> {total_expenses:,.2f} ₽\n"
-    report += f"✅ <b>Баланс:</b> {stats['balance']:,.2f} ₽\n"
+async def show_period_report(message: Message, session: AsyncSession, period_text: str):
+    """/report 2025-01..2025-06 или /report 6 - последние 6 месяцев"""
+    this_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
 
-    if total_income > 0:
-        expense_percent = (total_expenses / total_income) * 100
-        savings_percent = (stats['balance'] / total_income) * 100
-        report += f"📈 <b>Накопления:</b> {savings_percent:.1f}% от доходов\n\n"
+    if period_text.isdigit() and 1 <= int(period_text) <= MAX_REPORT_MONTHS:
+        count = int(period_text)
+        start, end = add_months(this_month, 1 - count), add_months(this_month, 1)
+        title = f"Отчёт за последние {count} мес."
+    else:
+        period = parse_period(period_text)
+        if period is None:
+            await message.answer(
+                "📊 <b>Формат команды:</b>\n"
+                "<code>/report</code> - текущий месяц\n"
+                "<code>/report 6</code> - последние 6 месяцев\n"
+                "<code>/report 2025-01..2025-06</code> - произвольный период",
+                parse_mode="HTML"
+            )
+            return
+        start, end = period
+        title = f"Отчёт за {start:%m.%Y} - {add_months(end, -1):%m.%Y}"
+
+    months = await get_period_report(message.from_user.id, session, start, end)
+    for part in split_message(render_period_report(title, months)):
+        await message.answer(part, parse_mode="HTML")
+
+
+@router.message(Command("chart"))
+async def show_chart(message: Message, session: AsyncSession, command: CommandObject):
+    """/chart - расходы текущего месяца по категориям, /chart N - доходы и расходы за N месяцев"""
+    args = (command.args or "").strip()
+
+    if not args:
+        stats = await get_monthly_statistics(message.from_user.id, session)
+        if not stats['expenses_by_category']:
+            await message.answer("📭 В этом месяце расходов пока нет")
+            return
+        categories = sorted(stats['expenses_by_category'].items(), key=lambda item: item[1], reverse=True)
+        chart = await get_chart(
+            render_pie, f"Расходы: {stats['month']}",
+            [label for label, _ in categories], [to_rubles(total) for _, total in categories]
+        )
+    elif args.isdigit() and 1 <= int(args) <= MAX_REPORT_MONTHS:
+        count = int(args)
+        this_month = datetime.now().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        months = await get_period_report(
+            message.from_user.id, session, add_months(this_month, 1 - count), add_months(this_month, 1)
+        )
+        if not months:
+            await message.answer("📭 За этот период операций нет")
+            return
+        chart = await get_chart(
+            render_bars, f"Доходы и расходы за {count} мес.",
+            [month['month'] for month in months],
+            [to_rubles(month['total_income']) for month in months],
+            [to_rubles(month['total_expenses']) for month in months]
+        )
     else:
-        report += "\n"
+        await message.answer(
+            "📈 <b>Формат команды:</b>\n"
+            "<code>/chart</code> - расходы текущего месяца по категориям\n"
+            f"<code>/chart 6</code> - доходы и расходы по месяцам (до {MAX_REPORT_MONTHS})",
+            parse_mode="HTML"
+        )
+        return
 
-    if total_income > 0:
-        report += "📊 <b>Структура бюджета:</b>\n"
-        for category, amount in stats['expenses_by_category'].items():
-            # Считаем проценты от ДОХОДОВ!
-            percentage = (amount / total_income) * 100
-            report += f"• {category}: {amount:,.2f} ₽ ({percentage:.1f}% доходов)\n"
+    key, file_id, png = chart
+    if file_id is not None:
+        # Та же картинка уже загружена в Telegram - отправляем по file_id без рисования и загрузки
+        await message.answer_photo(file_id)
+        return
 
-    await message.answer(report, parse_mode="HTML")
+    sent = await message.answer_photo(BufferedInputFile(png, filename="chart.png"))
+    chart_cache.set_file_id(key, sent.photo[-1].file_id)
 
 
-@router.message(F.text == "💡 Советы")
+@router.message(F.text == ADVICE)
 @router.message(Command("advice"))
 async def show_advice(message: Message, session: AsyncSession):
     """Показать финансовые советы"""
-    advice_list = await generate_financial_advice(message.from_user.id, session)
+    month = date.today().replace(day=1)
 
-    if not advice_list:
-        await message.answer("📊 Недостаточно данных для анализа. Добавьте несколько доходов и расходов.")
-        return
-
-    advice_text = "💡 <b>Персональные финансовые советы:</b>\n\n"
-
-    for i, advice in enumerate(advice_list, 1):
-        advice_text += f"{i}. {advice}\n"
-
-    # Добавляем общие рекомендации
-    advice_text += "\n📚 <b>Общие рекомендации:</b>\n"
-    advice_text += "• Правило 50/30/20: 50% на нужды, 30% на желания, 20% на накопления\n"
-    advice_text += "• Создайте финансовую подушку безопасности (3-6 месячных доходов)\n"
-    advice_text += "• Регулярно отслеживайте свои финансы"
+    advice_text = report_cache.get(message.from_user.id, month, 'advice')
+    if advice_text is None:
+        generation = report_cache.generation(message.from_user.id)
+        advice_list = await generate_financial_advice(message.from_user.id, session)
+        advice_text = render_advice(advice_list)
+        report_cache.set(message.from_user.id, month, 'advice', advice_text, generation)
 
     await message.answer(advice_text, parse_mode="HTML")
 
 
 @router.message(Command("last"))
-@router.message(F.text == "📋 Последние операции")
+@router.message(F.text == LAST_OPERATIONS)
 async def show_last_transactions(message: Message, session: AsyncSession):
     """Показать последние 5 операций"""
-    # Последние расходы
-    expenses_stmt = select(Expense).where(
-        Expense.user_id == message.from_user.id
-    ).order_by(desc(Expense.created_at)).limit(5)
-
-    expenses_result = await session.execute(expenses_stmt)
-    last_expenses = expenses_result.scalars().all()
-
-    # Последние доходы
-    incomes_stmt = select(Income).where(
-        Income.user_id == message.from_user.id
-    ).order_by(desc(Income.created_at)).limit(5)
-
-    incomes_result = await session.execute(incomes_stmt)
-    last_incomes = incomes_result.scalars().all()
-
-    # Формируем сообщение
-    transactions_text = "📋 <b>Последние операции:</b>\n\n"
-
-    if not last_expenses and not last_incomes:
-        transactions_text += "📭 Операций пока нет\n"
-        transactions_text += "💸 Добавьте первый расход: /spent 500 такси"
-    else:
-        # Объединяем и сортируем все операции по дате
-        all_operations = []
-
-        for expense in last_expenses:
-            all_operations.append({
-                'type': '📤',
-                'amount': expense.amount,
-                'category': expense.category,
-                'date': expense.created_at,
-                'description': expense.description
-            })
-
-        for income in last_incomes:
-            all_operations.append({
-                'type': '💰',
-                'amount': income.amount,
-                'category': income.source,
-                'date': income.created_at,
-                'description': None
-            })
-
-        # Сортируем по дате (новые сверху)
-        all_operations.sort(key=lambda x: x['date'], reverse=True)
-
-        # Выводим последние 5 операций
-        for op in all_operations[:5]:
-            date_str = op['date'].strftime("%d.%m %H:%M")
-            desc_text = f" - {op['description']}" if op['description'] else ""
-            transactions_text += f"{op['type']} {op['amount']:,.2f} ₽ - {op['category']}{desc_text}\n"
-            transactions_text += f"<i>🕐 {date_str}</i>\n\n"
-
-    await message.answer(transactions_text, parse_mode="HTML")
\ No newline at end of file
+    operations = await get_last_operations(message.from_user.id, session)
+    await message.answer(render_last_operations(operations), parse_mode="HTML")
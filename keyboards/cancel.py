@@ -1,8 +1,11 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup
+
+from keyboards.labels import CANCEL
+from keyboards.markup import build_keyboard
+
+CANCEL_KEYBOARD = build_keyboard([[CANCEL]])
+
 
 def get_cancel_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура только с кнопкой отмены"""
-    return ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="❌ Отмена")]],
-        resize_keyboard=True
-    )
\ No newline at end of file
+    return CANCEL_KEYBOARD
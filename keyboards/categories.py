@@ -1,13 +1,11 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup
+
+from keyboards.labels import CANCEL, EXPENSE_CATEGORIES
+from keyboards.markup import build_keyboard, chunked
+
+CATEGORIES_KEYBOARD = build_keyboard(chunked(EXPENSE_CATEGORIES + (CANCEL,)))
+
 
 def get_categories_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура с категориями расходов"""
-    categories = [
-        [KeyboardButton(text="🏠 Жилье"), KeyboardButton(text="🍎 Продукты")],
-        [KeyboardButton(text="🚗 Транспорт"), KeyboardButton(text="💊 Здоровье")],
-        [KeyboardButton(text="🎮 Развлечения"), KeyboardButton(text="🛍️ Покупки")],
-        [KeyboardButton(text="✈️ Путешествия"), KeyboardButton(text="📚 Образование")],
-        [KeyboardButton(text="💳 Кредит"), KeyboardButton(text="💾 Прочее")],
-        [KeyboardButton(text="❌ Отмена")]
-    ]
-    return ReplyKeyboardMarkup(keyboard=categories, resize_keyboard=True)
\ No newline at end of file
+    return CATEGORIES_KEYBOARD
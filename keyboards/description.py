@@ -1,9 +1,11 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup
+
+from keyboards.labels import CANCEL, SKIP
+from keyboards.markup import build_keyboard
+
+DESCRIPTION_KEYBOARD = build_keyboard([[SKIP], [CANCEL]])
+
 
 def get_description_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура для ввода описания"""
-    buttons = [
-        [KeyboardButton(text="Пропустить")],
-        [KeyboardButton(text="❌ Отмена")]
-    ]
-    return ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True)
\ No newline at end of file
+    return DESCRIPTION_KEYBOARD
@@ -1,11 +1,11 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup
+
+from keyboards.labels import CANCEL, INCOME_SOURCES
+from keyboards.markup import build_keyboard, chunked
+
+INCOME_SOURCES_KEYBOARD = build_keyboard(chunked(INCOME_SOURCES + (CANCEL,)))
+
 
 def get_income_sources_keyboard() -> ReplyKeyboardMarkup:
     """Клавиатура с источниками доходов"""
-    sources = [
-        [KeyboardButton(text="💼 Зарплата"), KeyboardButton(text="💼 Фриланс")],
-        [KeyboardButton(text="📈 Инвестиции"), KeyboardButton(text="🎁 Подарок")],
-        [KeyboardButton(text="🔄 Возврат долга"), KeyboardButton(text="🏆 Премия")],
-        [KeyboardButton(text="💸 Прочее"), KeyboardButton(text="❌ Отмена")]
-    ]
-    return ReplyKeyboardMarkup(keyboard=sources, resize_keyboard=True)
\ No newline at end of file
+    return INCOME_SOURCES_KEYBOARD
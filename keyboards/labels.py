@@ -0,0 +1,32 @@
+# Тексты кнопок. Хендлеры сравнивают message.text с этими же константами,
+# поэтому клавиатуры и проверки ввода не могут разойтись
+
+# Главное меню
+ADD_EXPENSE = "📥 Добавить расход"
+ADD_INCOME = "💰 Добавить доход"
+STATISTICS = "📊 Статистика"
+LAST_OPERATIONS = "📋 Последние операции"
+ADVICE = "💡 Советы"
+DELETE_OPERATION = "🗑️ Удалить операцию"
+HELP = "ℹ️ Помощь"
+
+CANCEL = "❌ Отмена"
+SKIP = "Пропустить"
+
+# Категории расходов в порядке кнопок на клавиатуре
+EXPENSE_CATEGORIES = (
+    "🏠 Жилье", "🍎 Продукты",
+    "🚗 Транспорт", "💊 Здоровье",
+    "🎮 Развлечения", "🛍️ Покупки",
+    "✈️ Путешествия", "📚 Образование",
+    "🍽️ Рестораны и кафе", "💳 Кредит",
+    "💾 Прочее",
+)
+
+# Источники доходов в порядке кнопок на клавиатуре
+INCOME_SOURCES = (
+    "💼 Зарплата", "💼 Фриланс",
+    "📈 Инвестиции", "🎁 Подарок",
+    "🔄 Возврат долга", "🏆 Премия",
+    "💸 Прочее",
+)
@@ -1,11 +1,18 @@
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup
+
+from keyboards.labels import (
+    ADD_EXPENSE, ADD_INCOME, ADVICE, DELETE_OPERATION, HELP, LAST_OPERATIONS, STATISTICS
+)
+from keyboards.markup import build_keyboard
+
+MAIN_KEYBOARD = build_keyboard([
+    [ADD_EXPENSE, ADD_INCOME],
+    [STATISTICS, LAST_OPERATIONS],
+    [ADVICE, DELETE_OPERATION],
+    [HELP]
+])
+
 
 def get_main_keyboard() -> ReplyKeyboardMarkup:
     """Главное меню бота с кнопкой удаления"""
-    buttons = [
-        [KeyboardButton(text="📥 Добавить расход"), KeyboardButton(text="💰 Добавить доход")],
-        [KeyboardButton(text="📊 Статистика"), KeyboardButton(text="📋 Последние операции")],
-        [KeyboardButton(text="💡 Советы"), KeyboardButton(text="🗑️ Удалить операцию")],
-        [KeyboardButton(text="ℹ️ Помощь")]
-    ]
-    return ReplyKeyboardMarkup(keyboard=buttons, resize_keyboard=True)
\ No newline at end of file
+    return MAIN_KEYBOARD
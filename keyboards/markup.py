@@ -0,0 +1,53 @@
+import json
+
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.types import KeyboardButton, ReplyKeyboardMarkup
+from aiohttp import FormData
+
+# id(клавиатуры) -> готовый JSON. Клавиатуры - модульные синглтоны и живут всё время
+# работы процесса, поэтому id не переиспользуется
+_serialized = {}
+
+
+def build_keyboard(rows) -> ReplyKeyboardMarkup:
+    """Собрать клавиатуру один раз и сразу запомнить её JSON для отправки.
+
+    rows - последовательность рядов с текстами кнопок. Клавиатура неизменяемая:
+    её нельзя править после создания, иначе закэшированный JSON разойдётся с ней.
+    """
+    markup = ReplyKeyboardMarkup(
+        keyboard=[[KeyboardButton(text=text) for text in row] for row in rows],
+        resize_keyboard=True
+    )
+    _serialized[id(markup)] = json.dumps(markup.model_dump(exclude_none=True))
+    return markup
+
+
+def chunked(labels, size: int = 2) -> list:
+    """Тексты кнопок по size в ряд"""
+    return [labels[i:i + size] for i in range(0, len(labels), size)]
+
+
+class PrecompiledMarkupSession(AiohttpSession):
+    """Сессия Bot API, которая отправляет готовый JSON клавиатур вместо сериализации на каждый запрос.
+
+    AiohttpSession сериализует запрос через method.model_dump(), и к prepare_value клавиатура
+    приходит уже словарём - поэтому готовый JSON подставляется здесь, при сборке формы.
+    """
+
+    def build_form_data(self, bot, method) -> FormData:
+        serialized = _serialized.get(id(getattr(method, 'reply_markup', None)))
+        if serialized is None:
+            return super().build_form_data(bot, method)
+
+        form = FormData(quote_fields=False)
+        files = {}
+        for key, value in method.model_dump(warnings=False, exclude={'reply_markup'}).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        form.add_field('reply_markup', serialized)
+        for key, value in files.items():
+            form.add_field(key, value.read(bot), filename=value.filename or key)
+        return form
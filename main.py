@@ -1,37 +1,178 @@
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
-from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.client.telegram import TelegramAPIServer
 from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
 from aiogram.types import Message
 
 from config import settings
 from handlers import router
-from database.base import AsyncSessionLocal
+from keyboards.markup import PrecompiledMarkupSession
+from database.base import LazySession, engine
+from database.pool import warm_up_pool
+from database.fsm_storage import PostgresStorage
+from services.categories import category_registry
+from services.charts import shutdown_chart_executor
+from services.digest import run_digest_scheduler
+from services.metrics import HandlerLatencyMiddleware
+from services.metrics_export import start_metrics_server
+from services.outbox import CoalesceRepliesMiddleware, outbox
+from services.report_cache import report_cache
+from services.write_behind import pending_writes
+import sharding
+import webhook
 
 
 # Выносим middleware ВНЕ функции main
 class SessionMiddleware(BaseMiddleware):
+    """Сессия БД для хендлера. Соединение берётся из пула только при первом запросе,
+    а хендлеры с flags={"db": False} не получают сессию вовсе"""
     async def __call__(self, handler, event: Message, data: dict):
-        async with AsyncSessionLocal() as session:
-            data["session"] = session
+        if get_flag(data, "db", default=True) is False:
             return await handler(event, data)
 
+        session = LazySession()
+        data["session"] = session
+        try:
+            return await handler(event, data)
+        finally:
+            await session.close()
+
+
+def create_bot() -> Bot:
+    # Клавиатуры уходят готовым JSON, без сериализации на каждый ответ (keyboards/markup.py).
+    # TELEGRAM_API_URL позволяет направить бота на локальный Bot API или фейковый сервер для тестов
+    if settings.TELEGRAM_API_URL:
+        session = PrecompiledMarkupSession(api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL))
+    else:
+        session = PrecompiledMarkupSession()
+    # Все отправки идут через общие лимиты Telegram с повтором при 429 (services/outbox.py)
+    session.middleware(outbox)
+    return Bot(token=settings.BOT_TOKEN, session=session)
 
-async def main():
-    logging.basicConfig(level=logging.INFO)
 
-    bot = Bot(token=settings.BOT_TOKEN)
-    dp = Dispatcher()
+def start_digest_scheduler(bot: Bot):
+    # В нескольких процессах рассылку всё равно ведёт один - его держит advisory lock
+    if settings.DIGEST_ENABLED:
+        return asyncio.create_task(run_digest_scheduler(bot))
 
-    # Регистрируем middleware
-    dp.update.middleware(SessionMiddleware())
+
+def create_dispatcher() -> Dispatcher:
+    # Несколько webhook-воркеров получают апдейты одного пользователя вперемешку,
+    # поэтому локальные кэши состояний и отчётов в этом случае выключаем: операцию,
+    # записанную одним воркером, другой не увидел бы до истечения TTL
+    shared_between_workers = settings.BOT_MODE == "webhook" and settings.WEBHOOK_WORKERS > 1
+    storage = PostgresStorage(
+        ttl=settings.FSM_TTL_SECONDS,
+        cache_size=0 if shared_between_workers else settings.FSM_CACHE_SIZE
+    )
+    if shared_between_workers:
+        report_cache.max_size = 0
+    dp = Dispatcher(storage=storage)
+
+    # Отложенные операции дописываются в базу при остановке бота
+    dp.shutdown.register(pending_writes.close)
+    dp.shutdown.register(shutdown_chart_executor)
+
+    # Регистрируем middleware на уровне сообщений: там уже известен хендлер и его флаги.
+    # Склеенный ответ уходит после закрытия сессии, не держа соединение с базой
+    dp.message.middleware(HandlerLatencyMiddleware())
+    dp.message.middleware(CoalesceRepliesMiddleware())
+    dp.message.middleware(SessionMiddleware())
 
     # Подключаем роутеры
     dp.include_router(router)
+    return dp
+
 
+async def run_polling():
+    bot = create_bot()
+    dp = create_dispatcher()
+
+    if settings.DB_POOL_WARMUP:
+        await warm_up_pool(engine, settings.DB_POOL_SIZE)
+    await category_registry.load()
+    await start_metrics_server()
+
+    # Если раньше работали через вебхук, getUpdates без этого не заработает
+    await bot.delete_webhook()
+    start_digest_scheduler(bot)
     await dp.start_polling(bot)
 
 
+async def run_webhook_worker(index: int):
+    bot = create_bot()
+    dp = create_dispatcher()
+
+    if settings.DB_POOL_WARMUP:
+        await warm_up_pool(engine, settings.DB_POOL_SIZE)
+    await category_registry.load()
+    await start_metrics_server(index)
+
+    start_digest_scheduler(bot)
+    await webhook.serve(webhook.build_webhook_app(bot, dp))
+
+
+def webhook_worker_process(index: int):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_webhook_worker(index))
+
+
+async def run_shard_worker(update_queue, index: int):
+    bot = create_bot()
+    dp = create_dispatcher()
+
+    if settings.DB_POOL_WARMUP:
+        await warm_up_pool(engine, settings.DB_POOL_SIZE)
+    await category_registry.load()
+    metrics_runner = await start_metrics_server(1 + index)
+
+    try:
+        await sharding.consume(update_queue, lambda update: dp.feed_raw_update(bot, update))
+    finally:
+        if metrics_runner is not None:
+            await metrics_runner.cleanup()
+        await pending_writes.close()
+        await dp.storage.close()
+        await bot.session.close()
+
+
+def shard_worker_process(update_queue, index: int):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_shard_worker(update_queue, index))
+
+
+async def run_shard_supervisor(supervisor):
+    bot = create_bot()
+    async with bot.session:
+        await bot.delete_webhook()
+        start_digest_scheduler(bot)
+        await start_metrics_server(shard_stats=supervisor.stats)
+        await supervisor.run(bot, allowed_updates=create_dispatcher().resolve_used_update_types())
+
+
+async def register_webhook():
+    bot = create_bot()
+    async with bot.session:
+        await webhook.register_webhook(bot)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    if settings.BOT_MODE == "webhook":
+        asyncio.run(register_webhook())
+        webhook.run_workers(webhook_worker_process, settings.WEBHOOK_WORKERS)
+    elif settings.BOT_MODE == "sharded":
+        supervisor = sharding.ShardSupervisor(
+            shard_worker_process, settings.SHARD_WORKERS, settings.SHARD_QUEUE_SIZE
+        )
+        supervisor.start()
+        asyncio.run(run_shard_supervisor(supervisor))
+    else:
+        asyncio.run(run_polling())
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    main()
@@ -0,0 +1,18 @@
+import asyncio
+import sys
+
+from database.base import AsyncSessionLocal
+from services.rollup import rebuild_monthly_rollup
+
+
+async def rebuild(user_id: int = None):
+    async with AsyncSessionLocal() as session:
+        await rebuild_monthly_rollup(session, user_id)
+
+    target = f"пользователя {user_id}" if user_id else "всех пользователей"
+    print(f"✅ Агрегаты для {target} пересчитаны из исходных операций!")
+
+
+if __name__ == "__main__":
+    # python rebuild_rollup.py [telegram_id]
+    asyncio.run(rebuild(int(sys.argv[1]) if len(sys.argv) > 1 else None))
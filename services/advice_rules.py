@@ -0,0 +1,83 @@
+from bisect import bisect_right
+
+# --- Декларативное описание правил ---
+
+# Норма накоплений (% от доходов): верхняя граница полосы -> совет.
+# Последняя полоса без границы - всё, что выше.
+SAVINGS_RATE_BANDS = (
+    (0, "⚠️ Вы тратите больше, чем зарабатываете! Срочно пересмотрите расходы."),
+    (10, "💡 Накопления ({rate:.1f}%) ниже рекомендуемых 20%"),
+    (20, "💰 Норма накоплений: {rate:.1f}%"),
+    (None, "✅ Отличная норма накоплений: {rate:.1f}%!"),
+)
+
+# Максимальная доля категории в доходах, %
+CATEGORY_LIMITS = {
+    '🎮 Развлечения': 15,
+    '🍽️ Рестораны и кафе': 10,
+    '🛍️ Покупки': 15,
+    '💾 Прочее': 10
+}
+CATEGORY_LIMIT_ADVICE = "🎯 {category}: {percent:.1f}% доходов. Рекомендуется до {limit}%"
+
+# Правило 50/30/20: обязательные расходы и допустимый коридор их доли
+NECESSARY_CATEGORIES = ('🏠 Жилье', '🍎 Продукты', '🚗 Транспорт', '💊 Здоровье', '📚 Образование', '💳 Кредит')
+NECESSARY_HIGH = 60
+NECESSARY_LOW = 40
+NECESSARY_HIGH_ADVICE = "🏠 Обязательные расходы ({percent:.1f}%) превышают рекомендуемые 50%"
+NECESSARY_LOW_ADVICE = "💰 Вы хорошо контролируете обязательные расходы ({percent:.1f}%)"
+
+NO_INCOME_ADVICE = "💡 Добавьте данные о доходах для получения советов"
+
+
+class AdviceRules:
+    """Правила, скомпилированные один раз: границы полос для bisect, множества и словари для O(1) поиска"""
+
+    def __init__(self, savings_bands, category_limits, necessary_categories, necessary_high, necessary_low):
+        self.savings_bounds = [bound for bound, _ in savings_bands if bound is not None]
+        self.savings_templates = [template for _, template in savings_bands]
+        self.category_limits = dict(category_limits)
+        self.necessary_categories = frozenset(necessary_categories)
+        self.necessary_high = necessary_high
+        self.necessary_low = necessary_low
+
+    def evaluate(self, total_income: int, balance: int, expenses_by_category: dict) -> list:
+        """Советы для одной пары (пользователь, месяц)"""
+        if total_income == 0:
+            return [NO_INCOME_ADVICE]
+
+        rate = balance / total_income * 100
+        # Граница полосы не входит в неё: 10% - уже «норма», а не «ниже рекомендуемых»
+        band = bisect_right(self.savings_bounds, rate)
+        advice = [self.savings_templates[band].format(rate=rate)]
+
+        necessary = 0
+        for category, amount in expenses_by_category.items():
+            limit = self.category_limits.get(category)
+            if limit is not None:
+                percent = amount / total_income * 100
+                if percent > limit:
+                    advice.append(CATEGORY_LIMIT_ADVICE.format(category=category, percent=percent, limit=limit))
+            if category in self.necessary_categories:
+                necessary += amount
+
+        necessary_percent = necessary / total_income * 100
+        if necessary_percent > self.necessary_high:
+            advice.append(NECESSARY_HIGH_ADVICE.format(percent=necessary_percent))
+        elif necessary_percent < self.necessary_low and necessary > 0:
+            advice.append(NECESSARY_LOW_ADVICE.format(percent=necessary_percent))
+
+        return advice
+
+    def evaluate_batch(self, table: dict) -> dict:
+        """Советы сразу для многих пар: {(user_id, month): stats} -> {(user_id, month): [советы]}"""
+        evaluate = self.evaluate
+        return {
+            key: evaluate(stats['total_income'], stats['balance'], stats['expenses_by_category'])
+            for key, stats in table.items()
+        }
+
+
+ADVICE_RULES = AdviceRules(
+    SAVINGS_RATE_BANDS, CATEGORY_LIMITS, NECESSARY_CATEGORIES, NECESSARY_HIGH, NECESSARY_LOW
+)
@@ -0,0 +1,118 @@
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from database.base import AsyncSessionLocal
+from database.models import Category
+
+# Ключевые слова для автоматического определения категории (/spent, импорт выписок).
+# Формы слов («продуктов», «ресторане») находит классификатор по основам - см. services/classifier.py.
+# Основы короче четырёх букв («каф» у «кафе») совпадают только целиком, поэтому производные
+# от коротких слов («кафешка», «кофейня») перечислены отдельно
+CATEGORY_KEYWORDS = {
+    'еда': '🍎 Продукты',
+    'продукты': '🍎 Продукты',
+    'супермаркет': '🍎 Продукты',
+    'такси': '🚗 Транспорт',
+    'транспорт': '🚗 Транспорт',
+    'бензин': '🚗 Транспорт',
+    'метро': '🚗 Транспорт',
+    'автобус': '🚗 Транспорт',
+    'кино': '🎮 Развлечения',
+    'развлечения': '🎮 Развлечения',
+    'концерт': '🎮 Развлечения',
+    'игры': '🎮 Развлечения',
+    'кафе': '🍽️ Рестораны и кафе',
+    'ресторан': '🍽️ Рестораны и кафе',
+    'кафешка': '🍽️ Рестораны и кафе',
+    'кофе': '🍽️ Рестораны и кафе',
+    'кофейня': '🍽️ Рестораны и кафе',
+    'бар': '🍽️ Рестораны и кафе',
+    'обед': '🍽️ Рестораны и кафе',
+    'ужин': '🍽️ Рестораны и кафе',
+    'доставка': '🍽️ Рестораны и кафе',
+    'магазин': '🛍️ Покупки',
+    'покупки': '🛍️ Покупки',
+    'одежда': '🛍️ Покупки',
+    'обувь': '🛍️ Покупки',
+    'здоровье': '💊 Здоровье',
+    'лекарства': '💊 Здоровье',
+    'аптека': '💊 Здоровье',
+    'врач': '💊 Здоровье',
+    'жилье': '🏠 Жилье',
+    'коммуналка': '🏠 Жилье',
+    'аренда': '🏠 Жилье',
+    'ипотека': '🏠 Жилье',
+    'отель': '✈️ Путешествия',
+    'билеты': '✈️ Путешествия',
+    'путешествие': '✈️ Путешествия',
+    'отпуск': '✈️ Путешествия',
+    'курсы': '📚 Образование',
+    'книги': '📚 Образование',
+    'учеба': '📚 Образование',
+    'образование': '📚 Образование',
+    'кредит': '💳 Кредит',
+    'долг': '💳 Кредит',
+    'заем': '💳 Кредит'
+}
+
+
+OTHER_EXPENSE_CATEGORY = "💾 Прочее"
+
+
+class CategoryRegistry:
+    """Справочник categories в памяти: id <-> (тип, название).
+
+    Загружается целиком при старте процесса. Операции хранят только SMALLINT id,
+    названия подставляются отсюда при выводе. Незнакомый id (категорию завёл другой
+    процесс) подгружает справочник заново, незнакомое название добавляется в таблицу.
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
+        self._labels = {}  # id -> название
+        self._ids = {}  # (тип, название) -> id
+
+    async def load(self, session=None):
+        if session is None:
+            async with self.session_factory() as session:
+                return await self.load(session)
+
+        result = await session.execute(select(Category.id, Category.kind, Category.label))
+        for category_id, kind, label in result.all():
+            self._labels[category_id] = label
+            self._ids[(kind, label)] = category_id
+
+    async def resolve(self, session, ids):
+        """Убедиться, что все id из ids известны; вызывать перед label() для свежих данных"""
+        if any(category_id not in self._labels for category_id in ids):
+            await self.load(session)
+
+    def label(self, category_id: int) -> str:
+        return self._labels[category_id]
+
+    async def get_id(self, kind: str, label: str) -> int:
+        category_id = self._ids.get((kind, label))
+        if category_id is not None:
+            return category_id
+
+        # Отдельная короткая транзакция: откат операции не должен откатить новую категорию,
+        # id которой уже закэширован
+        async with self.session_factory() as session:
+            query = select(Category.id).where(Category.kind == kind, Category.label == label)
+            # Категорию мог завести другой процесс. Вставляем только отсутствующую:
+            # каждый ON CONFLICT тратит значение SMALLINT-последовательности
+            category_id = await session.scalar(query)
+            if category_id is None:
+                await session.execute(
+                    insert(Category).values(kind=kind, label=label)
+                    .on_conflict_do_nothing(index_elements=[Category.kind, Category.label])
+                )
+                await session.commit()
+                category_id = await session.scalar(query)
+
+        self._labels[category_id] = label
+        self._ids[(kind, label)] = category_id
+        return category_id
+
+
+category_registry = CategoryRegistry()
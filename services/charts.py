@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import io
+import json
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from config import settings
+
+
+# --- Рисование: выполняется в отдельных процессах, поэтому только чистые функции верхнего уровня ---
+
+def _plain_label(label: str) -> str:
+    """Убираем эмодзи в начале подписи: в стандартных шрифтах matplotlib их нет"""
+    first, _, rest = label.partition(' ')
+    return rest if rest and not first.isalnum() else label
+
+
+def _to_png(figure) -> bytes:
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=120, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def render_pie(title: str, labels: list, values: list) -> bytes:
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(6, 6))
+    axes = figure.subplots()
+    axes.pie(values, labels=[_plain_label(label) for label in labels], autopct="%1.0f%%", startangle=90)
+    axes.set_title(title)
+    axes.axis("equal")
+    return _to_png(figure)
+
+
+def render_bars(title: str, months: list, incomes: list, expenses: list) -> bytes:
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(8, 4.5))
+    axes = figure.subplots()
+    positions = range(len(months))
+    axes.bar([p - 0.2 for p in positions], incomes, width=0.4, label="Доходы", color="#4caf50")
+    axes.bar([p + 0.2 for p in positions], expenses, width=0.4, label="Расходы", color="#f44336")
+    axes.set_xticks(list(positions))
+    axes.set_xticklabels(months, rotation=45, ha="right")
+    axes.set_title(title)
+    axes.legend()
+    return _to_png(figure)
+
+
+# --- Кэш и запуск из event loop ---
+
+class ChartCache:
+    """Готовые картинки по хэшу данных: PNG в памяти и file_id уже загруженного в Telegram фото"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._png = OrderedDict()
+        self._file_ids = OrderedDict()
+        self.hits = 0
+        self.renders = 0
+
+    @staticmethod
+    def _get(storage: OrderedDict, key: str):
+        value = storage.get(key)
+        if value is not None:
+            storage.move_to_end(key)
+        return value
+
+    def _put(self, storage: OrderedDict, key: str, value):
+        storage[key] = value
+        storage.move_to_end(key)
+        if len(storage) > self.max_size:
+            storage.popitem(last=False)
+
+    def get_file_id(self, key: str):
+        return self._get(self._file_ids, key)
+
+    def set_file_id(self, key: str, file_id: str):
+        self._put(self._file_ids, key, file_id)
+
+    def get_png(self, key: str):
+        return self._get(self._png, key)
+
+    def set_png(self, key: str, png: bytes):
+        self._put(self._png, key, png)
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'renders': self.renders, 'png': len(self._png), 'file_ids': len(self._file_ids)}
+
+
+chart_cache = ChartCache(settings.CHART_CACHE_SIZE)
+_executor = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # fork из процесса с запущенным event loop, пулом соединений и потоками копирует их
+        # состояние в дочерний процесс; воркеры запускаются чистыми от forkserver (spawn там, где его нет)
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.CHART_WORKERS,
+            mp_context=multiprocessing.get_context(start_method)
+        )
+    return _executor
+
+
+def chart_key(render, *args) -> str:
+    """Хэш от вида графика и чисел - одинаковые данные дают одну и ту же картинку"""
+    payload = json.dumps([render.__name__, args], ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+async def get_chart(render, *args):
+    """Возвращает (key, file_id, png): file_id, если такое фото уже отправлялось, иначе PNG.
+
+    Рисование идёт в ProcessPoolExecutor и не блокирует event loop.
+    """
+    key = chart_key(render, *args)
+
+    file_id = chart_cache.get_file_id(key)
+    if file_id is not None:
+        chart_cache.hits += 1
+        return key, file_id, None
+
+    png = chart_cache.get_png(key)
+    if png is not None:
+        chart_cache.hits += 1
+    if png is None:
+        chart_cache.renders += 1
+        loop = asyncio.get_running_loop()
+        png = await loop.run_in_executor(_get_executor(), render, *args)
+        chart_cache.set_png(key, png)
+    return key, None, png
+
+
+def shutdown_chart_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,150 @@
+from collections import OrderedDict
+
+from sqlalchemy import select
+
+from config import settings
+from database.models import Expense
+from services.categories import CATEGORY_KEYWORDS, OTHER_EXPENSE_CATEGORY, category_registry
+
+# Окончания существительных и прилагательных, длинные раньше коротких
+_ENDINGS = tuple(sorted((
+    'иями', 'ями', 'ами', 'иях', 'ией', 'ях', 'ах', 'ов', 'ев', 'ей', 'ий', 'ый', 'ой', 'ая', 'яя',
+    'ое', 'ее', 'ие', 'ые', 'ом', 'ем', 'ам', 'ям', 'ию', 'ью', 'ия', 'ья',
+    'а', 'я', 'о', 'е', 'и', 'ы', 'у', 'ю', 'ь', 'й'
+), key=len, reverse=True))
+MIN_STEM = 2
+# Ключевое слово короче этого должно совпасть с основой целиком, длиннее - может быть её началом
+MIN_PREFIX = 4
+# Предлоги и короткие слова не учим: «с друзьями» не должно сделать «с» категорией
+MIN_LEARNED_WORD = 3
+_STOP_WORDS = frozenset(('для', 'без', 'при', 'про', 'под', 'над', 'это', 'все', 'еще', 'ещё'))
+
+
+def stem(word: str) -> str:
+    """Грубая основа русского слова: «продуктов», «продукты» -> «продукт», «такси» -> «такс»"""
+    word = word.lower().replace('ё', 'е').strip('.,;:!?()«»"\'')
+    for ending in _ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM:
+            return word[:-len(ending)]
+    return word
+
+
+def learning_word(description: str):
+    """Слово описания, по которому запоминается выбор категории: первое значимое или None"""
+    for word in (description or "").split():
+        word = word.strip('.,;:!?()«»"\'').lower()
+        if len(word) >= MIN_LEARNED_WORD and word.isalpha() and word not in _STOP_WORDS:
+            return word
+    return None
+
+
+class KeywordTrie:
+    """Префиксное дерево по основам ключевых слов.
+
+    Поиск идёт по буквам основы и возвращает категорию самого длинного совпавшего
+    ключевого слова: «продуктовый» находит «продукт(ы)». Короткие основы
+    («бар», «ед(а)») должны совпасть целиком, чтобы «барбершоп» не стал баром.
+    """
+
+    def __init__(self, keywords: dict):
+        self._root = {}
+        for word, category in keywords.items():
+            node = self._root
+            for char in stem(word):
+                node = node.setdefault(char, {})
+            node[None] = category  # ключ None - на этом узле заканчивается ключевое слово
+
+    def lookup(self, word_stem: str):
+        node = self._root
+        found = None
+        for depth, char in enumerate(word_stem, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node and (depth == len(word_stem) or depth >= MIN_PREFIX):
+                found = node[None]
+        return found
+
+
+class CategoryClassifier:
+    """Категория расхода по слову: сначала выученные выборы пользователя, затем словарь.
+
+    Выученное - {основа слова: категория} по прошлым расходам пользователя: слово
+    из /spent или первое значимое слово описания, введённого в диалоге. Хранится в LRU по пользователям, загружается из базы при первом
+    обращении и дополняется при каждой новой записи. Всё - O(длины слова).
+    """
+
+    def __init__(self, keywords: dict, cache_size: int, history_limit: int):
+        self.trie = KeywordTrie(keywords)
+        self.cache_size = cache_size
+        self.history_limit = history_limit
+        self._learned = OrderedDict()  # user_id -> {основа: категория}
+        self.loads = 0
+
+    def classify(self, word: str, learned: dict = None) -> str:
+        word_stem = stem(word)
+        if learned:
+            category = learned.get(word_stem)
+            if category is not None:
+                return category
+        return self.trie.lookup(word_stem) or OTHER_EXPENSE_CATEGORY
+
+    async def learned_for(self, session, user_id: int) -> dict:
+        learned = self._learned.get(user_id)
+        if learned is not None:
+            self._learned.move_to_end(user_id)
+            return learned
+
+        result = await session.execute(
+            select(Expense.description, Expense.category_id)
+            .where(Expense.user_id == user_id, Expense.description.is_not(None))
+            .order_by(Expense.created_at.desc())
+            .limit(self.history_limit)
+        )
+        rows = result.all()
+        self.loads += 1
+        await category_registry.resolve(session, {category_id for _, category_id in rows})
+
+        learned = {}
+        # От старых к новым: последний выбор пользователя перекрывает прежние
+        for description, category_id in reversed(rows):
+            word = learning_word(description)
+            if word is not None:
+                self._remember(learned, word, category_registry.label(category_id))
+
+        self._learned[user_id] = learned
+        while len(self._learned) > self.cache_size:
+            self._learned.popitem(last=False)
+        return learned
+
+    async def for_user(self, session, user_id: int):
+        """Функция слово -> категория с учётом выученного для пользователя"""
+        learned = await self.learned_for(session, user_id)
+        return lambda word: self.classify(word, learned)
+
+    def learn(self, user_id: int, word: str, category: str):
+        """Учесть новый выбор; если выученное пользователя ещё не загружено - загрузится из базы"""
+        learned = self._learned.get(user_id)
+        if learned is not None:
+            self._remember(learned, word, category)
+
+    def stats(self) -> dict:
+        return {'users': len(self._learned), 'loads': self.loads}
+
+    @staticmethod
+    def _remember(learned: dict, word: str, category: str):
+        # «Прочее» и так ответ по умолчанию - вместо записи забываем прежний выбор
+        if category == OTHER_EXPENSE_CATEGORY:
+            learned.pop(stem(word), None)
+        else:
+            learned[stem(word)] = category
+
+
+category_classifier = CategoryClassifier(
+    CATEGORY_KEYWORDS, settings.CLASSIFIER_CACHE_SIZE, settings.CLASSIFIER_HISTORY_SIZE
+)
+
+
+def guess_category(word: str) -> str:
+    """Категория по слову без учёта пользователя (импорт выписок)"""
+    return category_classifier.classify(word)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from aiogram.exceptions import TelegramAPIError, TelegramForbiddenError, TelegramBadRequest
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from database.base import AsyncSessionLocal, engine
+from database.models import DigestRun, User
+from services.finance_calculations import get_statistics_batch
+from services.periods import add_months
+from services.reports import render_report
+
+logger = logging.getLogger(__name__)
+
+# Ключ advisory lock: рассылку ведёт только один процесс
+DIGEST_LOCK_KEY = 7_330_001
+# Пользователей на одну выборку статистики
+PAGE_SIZE = 1000
+
+
+async def send_digest(bot, chat_id: int, report: str) -> bool:
+    """True - доставлено, False - чат недоступен (бот заблокирован, чат удалён) или отправка не удалась.
+
+    Лимиты Telegram и повторы при 429 берёт на себя outbox в сессии бота. Ошибка одного
+    получателя не прерывает пачку: курсор рассылки всё равно сдвигается дальше.
+    """
+    try:
+        await bot.send_message(chat_id, report, parse_mode="HTML")
+        return True
+    except (TelegramForbiddenError, TelegramBadRequest):
+        return False
+    except TelegramAPIError as e:
+        # 429 после всех попыток outbox, сетевые ошибки, 5xx
+        logger.warning("Отчёт пользователю %s не отправлен: %s", chat_id, e)
+        return False
+    except Exception:
+        logger.exception("Отчёт пользователю %s не отправлен", chat_id)
+        return False
+
+
+def digest_month(now: datetime) -> datetime:
+    """Месяц, за который рассылается отчёт: предыдущий относительно now"""
+    return add_months(now.replace(day=1, hour=0, minute=0, second=0, microsecond=0), -1)
+
+
+async def _user_pages(session, after_user_id: int):
+    while True:
+        result = await session.execute(
+            select(User.telegram_id).where(User.telegram_id > after_user_id)
+            .order_by(User.telegram_id).limit(PAGE_SIZE)
+        )
+        page = result.scalars().all()
+        if not page:
+            return
+        yield page
+        after_user_id = page[-1]
+
+
+async def broadcast_digest(bot, month: datetime):
+    """Разослать отчёт за month всем пользователям с операциями в этом месяце.
+
+    Пользователи обходятся по возрастанию telegram_id, курсор сохраняется в
+    digest_runs после каждой пачки - после падения рассылка продолжается с места
+    остановки. Статистика считается одним запросом на страницу пользователей.
+    """
+    month_start = month.date()
+    next_month = add_months(month, 1)
+    # Столько отправок укладывается в секунду общего лимита - их и запускаем параллельно
+    chunk_size = max(int(settings.TELEGRAM_GLOBAL_RATE), 1)
+
+    async with engine.connect() as lock_connection:
+        locked = await lock_connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {'key': DIGEST_LOCK_KEY})
+        if not locked:
+            logger.info("Рассылку уже ведёт другой процесс")
+            return
+
+        try:
+            async with AsyncSessionLocal() as session:
+                await session.execute(
+                    insert(DigestRun).values(month=month_start, last_user_id=0, sent=0)
+                    .on_conflict_do_nothing(index_elements=[DigestRun.month])
+                )
+                await session.commit()
+                run = await session.get(DigestRun, month_start)
+                if run.finished_at is not None:
+                    return
+
+                logger.info("Рассылка отчёта за %s с пользователя %s", month_start, run.last_user_id)
+                async for page in _user_pages(session, run.last_user_id):
+                    table = await get_statistics_batch(session, month, next_month, user_ids=page)
+
+                    for i in range(0, len(page), chunk_size):
+                        chunk = page[i:i + chunk_size]
+                        recipients = [user_id for user_id in chunk if (user_id, month_start) in table]
+                        results = await asyncio.gather(*(
+                            send_digest(bot, user_id, render_report(table[(user_id, month_start)]))
+                            for user_id in recipients
+                        ))
+
+                        run.last_user_id = chunk[-1]
+                        run.sent += sum(results)
+                        await session.commit()
+
+                run.finished_at = func.now()
+                await session.commit()
+                logger.info("Рассылка за %s завершена: %s сообщений", month_start, run.sent)
+        finally:
+            await lock_connection.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': DIGEST_LOCK_KEY})
+
+
+async def run_digest_scheduler(bot):
+    """Каждое 1-е число в DIGEST_HOUR разослать отчёт за прошлый месяц.
+
+    При старте доделывает рассылку, если она была начата и прервана.
+    """
+    while True:
+        now = datetime.now()
+        month = digest_month(now)
+        due = now.replace(day=1, hour=settings.DIGEST_HOUR, minute=0, second=0, microsecond=0)
+
+        async with AsyncSessionLocal() as session:
+            run = await session.get(DigestRun, month.date())
+        interrupted = run is not None and run.finished_at is None
+
+        if interrupted or (now.day == 1 and now >= due and run is None):
+            try:
+                await broadcast_digest(bot, month)
+            except Exception:
+                logger.exception("Рассылка отчёта за %s прервана", month.date())
+                await asyncio.sleep(60)
+                continue
+
+        next_run = due if datetime.now() < due else add_months(due, 1)
+        await asyncio.sleep(max((next_run - datetime.now()).total_seconds(), 1))
@@ -0,0 +1,104 @@
+import asyncio
+import csv
+import tempfile
+
+from sqlalchemy import literal, select, union_all
+
+from database.models import Expense, Income
+from services.categories import category_registry
+from services.money import to_decimal
+from services.rollup import EXPENSE, INCOME
+
+# Сколько строк за раз тянуть с серверного курсора
+STREAM_BATCH_SIZE = 1000
+
+HEADER = ["Дата", "Тип", "Сумма", "Категория/источник", "Описание"]
+
+
+def _operations_query(user_id: int, start=None, end=None):
+    expenses = select(
+        Expense.created_at, literal(EXPENSE).label('kind'), Expense.amount,
+        Expense.category_id, Expense.description
+    ).where(Expense.user_id == user_id)
+    incomes = select(
+        Income.created_at, literal(INCOME).label('kind'), Income.amount,
+        Income.source_id.label('category_id'), Income.description
+    ).where(Income.user_id == user_id)
+
+    if start is not None:
+        expenses = expenses.where(Expense.created_at >= start, Expense.created_at < end)
+        incomes = incomes.where(Income.created_at >= start, Income.created_at < end)
+
+    ledger = union_all(expenses, incomes).subquery()
+    return select(ledger).order_by(ledger.c.created_at)
+
+
+def _to_row(operation) -> list:
+    return [
+        operation.created_at.strftime("%d.%m.%Y %H:%M"),
+        "Расход" if operation.kind == EXPENSE else "Доход",
+        to_decimal(operation.amount),
+        category_registry.label(operation.category_id),
+        operation.description or ""
+    ]
+
+
+class _CsvWriter:
+    def __init__(self, path):
+        # utf-8-sig - чтобы Excel сразу открыл кириллицу
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file, delimiter=";")
+        self.writer.writerow(HEADER)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _XlsxWriter:
+    def __init__(self, path):
+        from openpyxl import Workbook  # нужен только для выгрузки в Excel
+
+        self.path = path
+        # write_only: строки сразу уходят во временный XML, а не копятся в памяти
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Операции")
+        self.sheet.append(HEADER)
+
+    def write(self, rows):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+async def export_operations(session, user_id: int, start=None, end=None, file_format: str = "csv") -> tuple:
+    """Выгрузить операции пользователя в файл.
+
+    Строки читаются серверным курсором пачками по STREAM_BATCH_SIZE, запись в файл
+    идёт в отдельном потоке - память постоянна, event loop не блокируется.
+    Возвращает (путь к файлу, количество строк).
+    """
+    suffix = ".xlsx" if file_format == "xlsx" else ".csv"
+    path = tempfile.NamedTemporaryFile(prefix="export_", suffix=suffix, delete=False).name
+    writer_class = _XlsxWriter if file_format == "xlsx" else _CsvWriter
+    writer = await asyncio.to_thread(writer_class, path)
+
+    # Справочник целиком: строки выгрузки ссылаются на любые категории пользователя
+    await category_registry.load(session)
+
+    exported = 0
+    try:
+        stmt = _operations_query(user_id, start, end).execution_options(yield_per=STREAM_BATCH_SIZE)
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            rows = [_to_row(operation) for operation in partition]
+            await asyncio.to_thread(writer.write, rows)
+            exported += len(rows)
+    finally:
+        await asyncio.to_thread(writer.close)
+
+    return path, exported
@@ -1,6 +1,11 @@
-from datetime import datetime, timedelta
-from sqlalchemy import select, func
-from database.models import Expense, Income
+from datetime import datetime
+from sqlalchemy import BigInteger, cast, select, func
+from database.models import MonthlyRollup
+from services.categories import category_registry
+from services.rollup import EXPENSE, INCOME
+from services.advice_rules import ADVICE_RULES
+from services.report_cache import report_cache
+from services.write_behind import pending_writes
 
 # Словарь для перевода месяцев
 RUSSIAN_MONTHS = {
@@ -15,111 +20,119 @@ async def get_monthly_statistics(user_id: int, session, month: datetime = None):
     if month is None:
         month = datetime.now()
 
-    # Определяем начало и конец месяца
+    # Агрегаты хранятся по первому дню месяца
     start_of_month = month.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    if month.month == 12:
-        end_of_month = month.replace(year=month.year + 1, month=1, day=1)
-    else:
-        end_of_month = month.replace(month=month.month + 1, day=1)
-
-    # Сумма доходов за месяц
-    income_stmt = select(func.coalesce(func.sum(Income.amount), 0)).where(
-        Income.user_id == user_id,
-        Income.created_at >= start_of_month,
-        Income.created_at < end_of_month
-    )
-    income_result = await session.execute(income_stmt)
-    total_income = income_result.scalar()
-
-    # Сумма расходов за месяц
-    expense_stmt = select(func.coalesce(func.sum(Expense.amount), 0)).where(
-        Expense.user_id == user_id,
-        Expense.created_at >= start_of_month,
-        Expense.created_at < end_of_month
-    )
-    expense_result = await session.execute(expense_stmt)
-    total_expenses = expense_result.scalar()
 
-    # Расходы по категориям
-    categories_stmt = select(
-        Expense.category,
-        func.sum(Expense.amount).label('total')
+    cached = report_cache.get(user_id, start_of_month.date(), 'stats')
+    if cached is not None:
+        return cached
+    # До запроса: если операция запишется, пока считаем, результат не закэшируется
+    generation = report_cache.generation(user_id)
+
+    # Один запрос: строки по категориям и итоги по типу (ROLLUP) из готовых агрегатов
+    stmt = select(
+        MonthlyRollup.kind,
+        MonthlyRollup.category_id,
+        # sum(bigint) в Postgres - numeric; копейки в bigint помещаются с запасом
+        cast(func.sum(MonthlyRollup.total), BigInteger)
     ).where(
-        Expense.user_id == user_id,
-        Expense.created_at >= start_of_month,
-        Expense.created_at < end_of_month
-    ).group_by(Expense.category)
-
-    categories_result = await session.execute(categories_stmt)
-    expenses_by_category = categories_result.all()
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.month == start_of_month.date(),
+        MonthlyRollup.operations_count > 0
+    ).group_by(func.rollup(MonthlyRollup.kind, MonthlyRollup.category_id))
+    rows = (await session.execute(stmt)).all()
+    await category_registry.resolve(session, {category_id for _, category_id, _ in rows if category_id is not None})
+
+    total_income = 0
+    total_expenses = 0
+    expenses_by_category = {}
+
+    for kind, category_id, total in rows:
+        if kind is None:
+            continue  # общий итог по всем типам не нужен
+        if category_id is None:
+            # Итоговая строка ROLLUP по типу операции
+            if kind == INCOME:
+                total_income = total
+            else:
+                total_expenses = total
+        elif kind == EXPENSE:
+            expenses_by_category[category_registry.label(category_id)] = total
+
+    # Операции пользователя, ещё не записанные пакетной записью
+    pending_expenses, pending_incomes = pending_writes.pending_for(user_id, month)
+    for row, category in pending_expenses:
+        total_expenses += row['amount']
+        expenses_by_category[category] = expenses_by_category.get(category, 0) + row['amount']
+    for row, _ in pending_incomes:
+        total_income += row['amount']
 
     # Русское название месяца
     russian_month = RUSSIAN_MONTHS.get(month.month, month.strftime('%B'))
 
-    return {
+    stats = {
         'total_income': total_income,
         'total_expenses': total_expenses,
         'balance': total_income - total_expenses,
-        'expenses_by_category': dict(expenses_by_category),
+        'expenses_by_category': expenses_by_category,
         'month': f"{russian_month} {month.year}"
     }
+    report_cache.set(user_id, start_of_month.date(), 'stats', stats, generation)
+    return stats
 
 
-async def generate_financial_advice(user_id: int, session):
-    """Генерация финансовых советов на основе статистики"""
-    stats = await get_monthly_statistics(user_id, session)
-
-    advice = []
-
-    total_income = stats['total_income']
-    total_expenses = stats['total_expenses']
-
-    if total_income == 0:
-        return ["💡 Добавьте данные о доходах для получения советов"]
-
-    # Анализ баланса
-    balance = stats['balance']
-    savings_rate = (balance / total_income) * 100
-
-    if balance < 0:
-        advice.append("⚠️ Вы тратите больше, чем зарабатываете! Срочно пересмотрите расходы.")
-    elif savings_rate < 10:
-        advice.append(f"💡 Накопления ({savings_rate:.1f}%) ниже рекомендуемых 20%")
-    elif savings_rate >= 20:
-        advice.append(f"✅ Отличная норма накоплений: {savings_rate:.1f}%!")
-    else:
-        advice.append(f"💰 Норма накоплений: {savings_rate:.1f}%")
-
-    # Анализ по категориям расходов (от доходов!)
-    for category, amount in stats['expenses_by_category'].items():
-        percent_of_income = (amount / total_income) * 100
-
-        # Правила для разных категорий
-        rules = {
-            '🎮 Развлечения': 15,
-            '🍽️ Рестораны и кафе': 10,
-            '🛍️ Покупки': 15,
-            '💾 Прочее': 10
-        }
-
-        if category in rules and percent_of_income > rules[category]:
-            advice.append(
-                f"🎯 {category}: {percent_of_income:.1f}% доходов. "
-                f"Рекомендуется до {rules[category]}%"
-            )
-
-    # Правило 50/30/20
-    necessary_categories = ['🏠 Жилье', '🍎 Продукты', '🚗 Транспорт', '💊 Здоровье', '📚 Образование', '💳 Кредит']
-    necessary_expenses = sum(
-        stats['expenses_by_category'].get(cat, 0)
-        for cat in necessary_categories
+async def get_statistics_batch(session, start: datetime, end: datetime, user_ids: list = None):
+    """Статистика сразу для многих пользователей и месяцев одним запросом по агрегатам.
+
+    Возвращает {(user_id, первый день месяца): stats} для месяцев в [start, end).
+    """
+    stmt = select(
+        MonthlyRollup.user_id,
+        MonthlyRollup.month,
+        MonthlyRollup.kind,
+        MonthlyRollup.category_id,
+        MonthlyRollup.total
+    ).where(
+        MonthlyRollup.month >= start.date(),
+        MonthlyRollup.month < end.date(),
+        MonthlyRollup.operations_count > 0
     )
+    if user_ids is not None:
+        stmt = stmt.where(MonthlyRollup.user_id.in_(user_ids))
+
+    rows = (await session.execute(stmt)).all()
+    await category_registry.resolve(session, {row.category_id for row in rows})
+
+    table = {}
+    for user_id, month, kind, category_id, total in rows:
+        stats = table.get((user_id, month))
+        if stats is None:
+            stats = table[(user_id, month)] = {
+                'total_income': 0,
+                'total_expenses': 0,
+                'expenses_by_category': {},
+                'month': f"{RUSSIAN_MONTHS[month.month]} {month.year}"
+            }
+        if kind == INCOME:
+            stats['total_income'] += total
+        else:
+            stats['total_expenses'] += total
+            stats['expenses_by_category'][category_registry.label(category_id)] = total
+
+    for stats in table.values():
+        stats['balance'] = stats['total_income'] - stats['total_expenses']
+    return table
+
+
+async def generate_financial_advice(user_id: int, session, stats: dict = None):
+    """Генерация финансовых советов на основе статистики"""
+    if stats is None:
+        stats = await get_monthly_statistics(user_id, session)
 
-    necessary_percent = (necessary_expenses / total_income) * 100
+    return ADVICE_RULES.evaluate(stats['total_income'], stats['balance'], stats['expenses_by_category'])
 
-    if necessary_percent > 60:
-        advice.append(f"🏠 Обязательные расходы ({necessary_percent:.1f}%) превышают рекомендуемые 50%")
-    elif necessary_percent < 40 and necessary_expenses > 0:
-        advice.append(f"💰 Вы хорошо контролируете обязательные расходы ({necessary_percent:.1f}%)")
 
-    return advice
\ No newline at end of file
+async def generate_financial_advice_batch(session, start: datetime, end: datetime, user_ids: list = None):
+    """Советы для всех пользователей и месяцев периода: один запрос и одно пакетное вычисление"""
+    table = await get_statistics_batch(session, start, end, user_ids)
+    return ADVICE_RULES.evaluate_batch(table)
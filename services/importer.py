@@ -0,0 +1,192 @@
+import codecs
+import csv
+from datetime import datetime
+
+from sqlalchemy import text
+
+from services.categories import OTHER_EXPENSE_CATEGORY, category_registry
+from services.classifier import guess_category
+from services.money import parse_money
+
+# Сколько строк отправлять в базу одним COPY
+COPY_CHUNK_SIZE = 5000
+# Колонки import_staging в порядке полей записей, которые уходят в COPY
+STAGING_COLUMNS = ('kind', 'created_at', 'amount', 'category_id', 'description')
+
+IMPORTED_INCOME_SOURCE = "💸 Прочее"
+
+DATE_FORMATS = ("%d.%m.%Y %H:%M:%S", "%d.%m.%Y %H:%M", "%d.%m.%Y",
+                "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+# Возможные названия колонок в выписках разных банков
+COLUMN_ALIASES = {
+    'date': ('дата', 'дата операции', 'date'),
+    'amount': ('сумма', 'сумма операции', 'amount'),
+    'category': ('категория', 'category'),
+    'description': ('описание', 'назначение', 'description')
+}
+
+
+class StatementFormatError(ValueError):
+    pass
+
+
+def _detect_encoding(chunk: bytes) -> str:
+    """UTF-8 (с BOM или без) или cp1251 - по первому чанку, где есть не-ASCII байты"""
+    try:
+        chunk.decode('utf-8')
+        return 'utf-8-sig'
+    except UnicodeDecodeError as e:
+        # Обрезанный на границе чанка многобайтный символ - не повод менять кодировку
+        return 'utf-8-sig' if e.start >= len(chunk) - 3 else 'cp1251'
+
+
+def _decode(decoder, chunk: bytes, final: bool = False) -> str:
+    try:
+        return decoder.decode(chunk, final=final)
+    except UnicodeDecodeError as e:
+        raise StatementFormatError("Не удалось прочитать выписку: кодировка не UTF-8 и не Windows-1251") from e
+
+
+async def iter_lines(chunks):
+    """Строки текста из потока байтов. Кодировка: UTF-8 (с BOM или без), иначе cp1251.
+
+    Пока идут только ASCII-байты, они одинаковы в обеих кодировках - кодировка
+    выбирается по первому чанку с кириллицей, а не просто по первому чанку.
+    """
+    decoder = None
+    buffer = ""
+
+    async for chunk in chunks:
+        if decoder is None and not chunk.isascii():
+            decoder = codecs.getincrementaldecoder(_detect_encoding(chunk))()
+
+        buffer += chunk.decode('ascii') if decoder is None else _decode(decoder, chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+
+    if decoder is not None:
+        buffer += _decode(decoder, b'', final=True)
+    if buffer.strip():
+        yield buffer.rstrip('\r')
+
+
+def _parse_header(line: str):
+    delimiter = ';' if line.count(';') > line.count(',') else ','
+    names = [name.strip().lower() for name in next(csv.reader([line], delimiter=delimiter))]
+
+    columns = {}
+    for field, aliases in COLUMN_ALIASES.items():
+        for index, name in enumerate(names):
+            if name in aliases:
+                columns[field] = index
+                break
+
+    if 'date' not in columns or 'amount' not in columns:
+        raise StatementFormatError("В выписке нет колонок «Дата» и «Сумма»")
+    return delimiter, columns
+
+
+def _parse_date(value: str) -> datetime:
+    value = value.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).astimezone()
+        except ValueError:
+            continue
+    raise ValueError(f"неизвестный формат даты: {value}")
+
+
+async def iter_statement(chunks):
+    """Разбор CSV-выписки по мере загрузки: ('expense' | 'income', created_at, копейки, label, description).
+
+    Отрицательная сумма - расход, положительная - доход. Категория расхода
+    определяется по колонке «Категория» или первому слову описания тем же
+    словарём, что и у /spent. Нераспознанные строки пропускаются.
+    """
+    delimiter = columns = None
+
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        if columns is None:
+            delimiter, columns = _parse_header(line)
+            continue
+
+        row = next(csv.reader([line], delimiter=delimiter))
+        try:
+            created_at = _parse_date(row[columns['date']])
+            amount = parse_money(row[columns['amount']])
+        except (ValueError, IndexError):
+            continue
+        if amount == 0:
+            continue
+
+        description = row[columns['description']].strip() if 'description' in columns else ""
+        category_text = row[columns['category']].strip() if 'category' in columns else ""
+
+        if amount < 0:
+            words = (category_text or description).split()
+            label = guess_category(words[0]) if words else OTHER_EXPENSE_CATEGORY
+            yield 'expense', created_at, -amount, label, description or None
+        else:
+            yield 'income', created_at, amount, IMPORTED_INCOME_SOURCE, None
+
+
+async def import_statement(session, user_id: int, chunks, on_progress=None) -> int:
+    """Загрузить выписку через COPY во временную таблицу и перенести в expenses/incomes.
+
+    Всё выполняется одной транзакцией вместе с обновлением агрегатов.
+    Возвращает количество импортированных операций.
+    """
+    connection = await session.connection()
+    raw = await connection.get_raw_connection()
+    driver = raw.driver_connection  # asyncpg.Connection
+
+    await session.execute(text("""
+        CREATE TEMP TABLE import_staging (
+            kind text, created_at timestamptz, amount bigint,
+            category_id smallint, description text
+        ) ON COMMIT DROP
+    """))
+
+    imported = 0
+    chunk = []
+    async for kind, created_at, amount, label, description in iter_statement(chunks):
+        # Выписка даёт только известные названия - id берутся из справочника в памяти
+        category_id = await category_registry.get_id(kind, label)
+        chunk.append((kind, created_at, amount, category_id, description))
+        if len(chunk) >= COPY_CHUNK_SIZE:
+            await driver.copy_records_to_table('import_staging', records=chunk, columns=STAGING_COLUMNS)
+            imported += len(chunk)
+            chunk = []
+            if on_progress is not None:
+                await on_progress(imported)
+
+    if chunk:
+        await driver.copy_records_to_table('import_staging', records=chunk, columns=STAGING_COLUMNS)
+        imported += len(chunk)
+
+    params = {'user_id': user_id}
+    await session.execute(text("""
+        INSERT INTO expenses (user_id, created_at, amount, category_id, description)
+        SELECT :user_id, created_at, amount, category_id, description
+        FROM import_staging WHERE kind = 'expense'
+    """), params)
+    await session.execute(text("""
+        INSERT INTO incomes (user_id, created_at, amount, source_id)
+        SELECT :user_id, created_at, amount, category_id
+        FROM import_staging WHERE kind = 'income'
+    """), params)
+    await session.execute(text("""
+        INSERT INTO monthly_rollups (user_id, month, kind, category_id, total, operations_count)
+        SELECT :user_id, date_trunc('month', created_at)::date, kind, category_id, sum(amount), count(*)
+        FROM import_staging
+        GROUP BY 2, 3, 4
+        ON CONFLICT (user_id, month, kind, category_id) DO UPDATE
+        SET total = monthly_rollups.total + excluded.total,
+            operations_count = monthly_rollups.operations_count + excluded.operations_count
+    """), params)
+    await session.commit()
+    return imported
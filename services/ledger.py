@@ -0,0 +1,42 @@
+from collections import namedtuple
+
+from sqlalchemy import select, literal, union_all, desc
+
+from database.models import Expense, Income
+from services.categories import category_registry
+from services.rollup import EXPENSE, INCOME
+
+Operation = namedtuple('Operation', 'kind id amount label description created_at')
+
+
+async def get_last_operations(user_id: int, session, limit: int = 5):
+    """Последние операции обоих типов одним запросом (UNION ALL ... ORDER BY created_at DESC LIMIT N)"""
+    expenses = select(
+        literal(EXPENSE).label('kind'),
+        Expense.id,
+        Expense.amount,
+        Expense.category_id,
+        Expense.description,
+        Expense.created_at
+    ).where(Expense.user_id == user_id).order_by(desc(Expense.created_at)).limit(limit)
+
+    incomes = select(
+        literal(INCOME).label('kind'),
+        Income.id,
+        Income.amount,
+        Income.source_id.label('category_id'),
+        Income.description,
+        Income.created_at
+    ).where(Income.user_id == user_id).order_by(desc(Income.created_at)).limit(limit)
+
+    # Каждая ветка берёт не больше N строк по индексу (user_id, created_at DESC)
+    ledger = union_all(expenses.subquery().select(), incomes.subquery().select()).subquery()
+    stmt = select(ledger).order_by(desc(ledger.c.created_at)).limit(limit)
+
+    rows = (await session.execute(stmt)).all()
+    await category_registry.resolve(session, {row.category_id for row in rows})
+    return [
+        Operation(row.kind, row.id, row.amount, category_registry.label(row.category_id),
+                  row.description, row.created_at)
+        for row in rows
+    ]
@@ -0,0 +1,104 @@
+import re
+import time
+from bisect import bisect_left
+
+from aiogram import BaseMiddleware
+
+# Границы корзин гистограмм задержки, секунды
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# Сколько разных рядов (хендлеров, запросов) держит одна гистограмма; остальное - в "other"
+MAX_SERIES = 500
+# Сколько текстов SQL запоминать вместе с их отпечатками
+FINGERPRINT_CACHE_SIZE = 2000
+
+
+class Histogram:
+    """Число наблюдений по корзинам LATENCY_BUCKETS, их сумма и количество"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # последняя корзина - +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+class HistogramFamily:
+    """Гистограммы одной метрики по значению метки: хендлер, отпечаток запроса"""
+
+    def __init__(self, name: str, label: str, description: str):
+        self.name = name
+        self.label = label
+        self.description = description
+        self.series = {}
+
+    def observe(self, value: str, seconds: float):
+        histogram = self.series.get(value)
+        if histogram is None:
+            if len(self.series) >= MAX_SERIES:
+                value = "other"
+            histogram = self.series.setdefault(value, Histogram())
+        histogram.observe(seconds)
+
+
+handler_latency = HistogramFamily(
+    'bot_handler_duration_seconds', 'handler', "Время обработки сообщения хендлером"
+)
+query_latency = HistogramFamily(
+    'db_query_duration_seconds', 'query', "Время выполнения SQL-запроса по отпечатку"
+)
+
+
+# --- Отпечатки SQL ---
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+# Параметры asyncpg ($1::INTEGER), psycopg (%(name)s, %s) и числа
+_PARAMETER = re.compile(r"\$\d+(?:::\w+(?:\[\])?)?|%\(\w+\)s|%s|\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_ROWS = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+_SPACES = re.compile(r"\s+")
+_fingerprints = {}
+
+
+def fingerprint(statement: str) -> str:
+    """SQL без значений: «IN ($1, $2, $3)» и VALUES на любое число строк дают один отпечаток"""
+    result = _fingerprints.get(statement)
+    if result is None:
+        result = _STRING.sub("?", statement)
+        result = _PARAMETER.sub("?", result)
+        result = _LIST.sub("(?)", result)
+        result = _ROWS.sub("(?)", result)
+        result = _SPACES.sub(" ", result).strip()
+
+        if len(_fingerprints) >= FINGERPRINT_CACHE_SIZE:
+            _fingerprints.clear()
+        _fingerprints[statement] = result
+    return result
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context.query_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    query_latency.observe(fingerprint(statement), time.perf_counter() - context.query_started)
+
+
+class HandlerLatencyMiddleware(BaseMiddleware):
+    """Время хендлера вместе с остальными middleware (сессия БД, отправка склеенного ответа).
+
+    Регистрируется на уровне сообщений первой: outer-middleware вызываются до выбора
+    хендлера, а здесь он уже известен.
+    """
+
+    async def __call__(self, handler, event, data: dict):
+        started = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            handler_latency.observe(data["handler"].callback.__name__, time.perf_counter() - started)
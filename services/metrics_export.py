@@ -0,0 +1,117 @@
+import logging
+
+from aiohttp import web
+
+from config import settings
+from database.pool import pool_stats
+from services.charts import chart_cache
+from services.classifier import category_classifier
+from services.metrics import LATENCY_BUCKETS, handler_latency, query_latency
+from services.outbox import outbox
+from services.report_cache import report_cache
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _metric(lines: list, name: str, kind: str, description: str, samples):
+    """samples - [(метки, значение)], метки - dict или None"""
+    lines.append(f"# HELP {name} {description}")
+    lines.append(f"# TYPE {name} {kind}")
+    for labels, value in samples:
+        if labels:
+            pairs = ",".join(f'{key}="{_label(label)}"' for key, label in labels.items())
+            lines.append(f"{name}{{{pairs}}} {value}")
+        else:
+            lines.append(f"{name} {value}")
+
+
+def _histograms(lines: list, family):
+    lines.append(f"# HELP {family.name} {family.description}")
+    lines.append(f"# TYPE {family.name} histogram")
+    for value, histogram in list(family.series.items()):
+        label = f'{family.label}="{_label(value)}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS, histogram.counts):
+            cumulative += count
+            lines.append(f'{family.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+        lines.append(f'{family.name}_bucket{{{label},le="+Inf"}} {histogram.count}')
+        lines.append(f"{family.name}_sum{{{label}}} {histogram.sum}")
+        lines.append(f"{family.name}_count{{{label}}} {histogram.count}")
+
+
+def render_metrics(shard_stats=None) -> str:
+    """Все метрики процесса в текстовом формате Prometheus"""
+    lines = []
+    _histograms(lines, handler_latency)
+    _histograms(lines, query_latency)
+
+    pool = pool_stats.snapshot()
+    _metric(lines, "db_pool_checkouts_total", "counter", "Выдано соединений из пула", [(None, pool['checkouts'])])
+    _metric(lines, "db_pool_slow_checkouts_total", "counter", "Ожиданий соединения дольше порога",
+            [(None, pool['slow_checkouts'])])
+    _metric(lines, "db_pool_wait_seconds", "gauge", "Ожидание соединения из пула", [
+        ({'stat': 'avg'}, pool['avg_wait']), ({'stat': 'p99'}, pool['p99_wait']), ({'stat': 'max'}, pool['max_wait'])
+    ])
+    _metric(lines, "db_pool_connections_in_use", "gauge", "Занятые соединения", [(None, pool['in_use'])])
+    _metric(lines, "db_pool_overflow", "gauge", "Соединения сверх DB_POOL_SIZE", [(None, pool['overflow'])])
+
+    cache = report_cache.stats()
+    _metric(lines, "report_cache_hits_total", "counter", "Попадания в кэш отчётов", [(None, cache['hits'])])
+    _metric(lines, "report_cache_misses_total", "counter", "Промахи кэша отчётов", [(None, cache['misses'])])
+    _metric(lines, "report_cache_entries", "gauge", "Записей в кэше отчётов", [(None, cache['size'])])
+
+    sending = outbox.stats()
+    _metric(lines, "telegram_send_queue_depth", "gauge", "Запросов ждут лимитов Telegram", [(None, sending['waiting'])])
+    _metric(lines, "telegram_sent_total", "counter", "Отправлено запросов в чаты", [(None, sending['sent'])])
+    _metric(lines, "telegram_retry_after_total", "counter", "Ответов 429 от Telegram", [(None, sending['retry_after'])])
+    _metric(lines, "telegram_coalesced_replies_total", "counter", "Ответов, склеенных с предыдущим",
+            [(None, sending['coalesced'])])
+
+    charts = chart_cache.stats()
+    _metric(lines, "chart_cache_hits_total", "counter", "Графики без рисования", [(None, charts['hits'])])
+    _metric(lines, "chart_renders_total", "counter", "Нарисовано графиков", [(None, charts['renders'])])
+    _metric(lines, "chart_cache_entries", "gauge", "Графиков в кэше", [
+        ({'kind': 'png'}, charts['png']), ({'kind': 'file_id'}, charts['file_ids'])
+    ])
+
+    classifier = category_classifier.stats()
+    _metric(lines, "classifier_users_cached", "gauge", "Пользователей с выученными словами в памяти",
+            [(None, classifier['users'])])
+    _metric(lines, "classifier_history_loads_total", "counter", "Загрузок истории расходов для классификатора",
+            [(None, classifier['loads'])])
+
+    if shard_stats is not None:
+        shards = shard_stats.snapshot()
+        _metric(lines, "shard_queue_depth", "gauge", "Апдейтов в очереди воркера",
+                [({'shard': i}, depth) for i, depth in enumerate(shards['queue_depth'])])
+        _metric(lines, "shard_dispatched_total", "counter", "Апдейтов отдано воркеру",
+                [({'shard': i}, count) for i, count in enumerate(shards['dispatched'])])
+        _metric(lines, "shard_blocked_seconds_total", "counter", "Ожидание места в очереди воркера",
+                [({'shard': i}, seconds) for i, seconds in enumerate(shards['blocked_seconds'])])
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+async def start_metrics_server(port_offset: int = 0, shard_stats=None):
+    """GET /metrics на METRICS_HOST:METRICS_PORT + port_offset; у каждого процесса свой порт"""
+    if not settings.METRICS_ENABLED:
+        return None
+
+    async def handle(request):
+        return web.Response(body=render_metrics(shard_stats).encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = settings.METRICS_PORT + port_offset
+    await web.TCPSite(runner, host=settings.METRICS_HOST, port=port).start()
+    logger.info("Метрики: http://%s:%s/metrics", settings.METRICS_HOST, port)
+    return runner
@@ -0,0 +1,44 @@
+import re
+from decimal import Decimal, ROUND_HALF_UP
+
+# Все суммы хранятся и считаются в копейках (целое число, BIGINT в базе):
+# сложение точное, без накопления ошибки float
+KOPECKS_IN_RUBLE = 100
+MAX_AMOUNT = 1_000_000_000 * KOPECKS_IN_RUBLE
+
+_NUMBER = re.compile(r'[+-]?\d+(?:\.\d+)?')
+
+
+def parse_money(text: str) -> int:
+    """Сумма в рублях из текста пользователя или выписки -> копейки.
+
+    Понимает «1 500», «1500,50», «1.500.50» (все разделители, кроме последнего,
+    считаются разделителями разрядов). Копейки округляются до целых.
+    Для нечисла - ValueError.
+    """
+    cleaned = text.strip().replace('\xa0', '').replace(' ', '').replace(',', '.')
+    if cleaned.count('.') > 1:
+        head, _, tail = cleaned.rpartition('.')
+        cleaned = head.replace('.', '') + '.' + tail
+    if not _NUMBER.fullmatch(cleaned):
+        raise ValueError(f"не сумма: {text}")
+    kopecks = (Decimal(cleaned) * KOPECKS_IN_RUBLE).quantize(Decimal(1), rounding=ROUND_HALF_UP)
+    return int(kopecks)
+
+
+def format_money(kopecks: int) -> str:
+    """150050 -> '1,500.50' (как прежний формат :,.2f)"""
+    kopecks = int(kopecks)
+    sign = '-' if kopecks < 0 else ''
+    rubles, rest = divmod(abs(kopecks), KOPECKS_IN_RUBLE)
+    return f"{sign}{rubles:,}.{rest:02d}"
+
+
+def to_decimal(kopecks: int) -> Decimal:
+    """150050 -> Decimal('1500.50'): точное значение в рублях для выгрузки в файлы"""
+    return Decimal(int(kopecks)).scaleb(-2)
+
+
+def to_rubles(kopecks: int) -> float:
+    """Для графиков и процентов, где точность до копейки не нужна"""
+    return kopecks / KOPECKS_IN_RUBLE
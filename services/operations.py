@@ -0,0 +1,91 @@
+from sqlalchemy import insert
+
+from config import settings
+from database.models import Expense, Income
+from services.categories import category_registry
+from services.classifier import category_classifier, learning_word
+from services.report_cache import report_cache
+from services.rollup import (
+    DEFAULT_INCOME_SOURCE, EXPENSE, INCOME, add_expense_to_rollup, add_income_to_rollup, add_inserted_to_rollup
+)
+from services.users import ensure_user
+from services.write_behind import pending_writes
+
+
+def _after_expenses_saved(user_id: int, saved: list):
+    """saved - [(слово, категория)]; слово - то, по которому выбрана категория, или None"""
+    # Сбрасываем после commit, чтобы параллельный отчёт не закэшировал старые суммы
+    report_cache.invalidate(user_id)
+    # Классификатор дообучается на каждой записи, не перечитывая историю
+    for word, category in saved:
+        if word is not None:
+            category_classifier.learn(user_id, word, category)
+
+
+async def save_expense(session, from_user, amount: int, category: str, description: str = None):
+    """Записать расход: сразу в базу или, при WRITE_BEHIND_ENABLED, в очередь пакетной записи"""
+    if settings.WRITE_BEHIND_ENABLED:
+        await pending_writes.add_expense(from_user, amount, category, description)
+        _after_expenses_saved(from_user.id, [(learning_word(description), category)])
+        return
+
+    # Пользователь регистрируется в той же транзакции, что и операция
+    await ensure_user(session, from_user)
+
+    expense = Expense(
+        amount=amount,
+        category_id=await category_registry.get_id(EXPENSE, category),
+        description=description,
+        user_id=from_user.id
+    )
+    session.add(expense)
+    await add_expense_to_rollup(session, expense)
+    await session.commit()
+    _after_expenses_saved(from_user.id, [(learning_word(description), category)])
+
+
+async def save_expenses(session, from_user, entries: list):
+    """Записать пачку расходов (ExpenseEntry) одной транзакцией: многострочный INSERT и
+    один пересчёт агрегатов по вставленным id"""
+    if settings.WRITE_BEHIND_ENABLED:
+        for entry in entries:
+            await pending_writes.add_expense(from_user, entry.amount, entry.category, entry.description)
+        _after_expenses_saved(from_user.id, [(entry.word, entry.category) for entry in entries])
+        return
+
+    await ensure_user(session, from_user)
+
+    rows = [
+        {
+            'user_id': from_user.id,
+            'amount': entry.amount,
+            'category_id': await category_registry.get_id(EXPENSE, entry.category),
+            'description': entry.description
+        }
+        for entry in entries
+    ]
+    result = await session.execute(insert(Expense).returning(Expense.id), rows)
+    await add_inserted_to_rollup(session, Expense, result.scalars().all())
+    await session.commit()
+    _after_expenses_saved(from_user.id, [(entry.word, entry.category) for entry in entries])
+
+
+async def save_income(session, from_user, amount: int, source: str):
+    """Записать доход: сразу в базу или, при WRITE_BEHIND_ENABLED, в очередь пакетной записи"""
+    source = source or DEFAULT_INCOME_SOURCE
+    if settings.WRITE_BEHIND_ENABLED:
+        await pending_writes.add_income(from_user, amount, source)
+        report_cache.invalidate(from_user.id)
+        return
+
+    await ensure_user(session, from_user)
+
+    income = Income(
+        amount=amount,
+        source_id=await category_registry.get_id(INCOME, source),
+        user_id=from_user.id
+    )
+    session.add(income)
+    await add_income_to_rollup(session, income)
+    await session.commit()
+    report_cache.invalidate(from_user.id)
@@ -0,0 +1,162 @@
+import logging
+from contextvars import ContextVar
+
+from aiogram import BaseMiddleware
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from config import settings
+from services.rate_limit import PerChatLimiter, TokenBucket
+
+logger = logging.getLogger(__name__)
+
+MAX_SEND_ATTEMPTS = 5
+# Лимит длины сообщения Telegram; склеенный ответ не должен его превышать
+MESSAGE_LIMIT = 4096
+
+# Буфер ответов текущего хендлера; вне хендлера (рассылка, фоновые задачи) - None
+_reply_buffer = ContextVar('reply_buffer', default=None)
+
+
+class ReplyBuffer:
+    """Подряд идущие sendMessage хендлера в один чат, ещё не отправленные.
+
+    Ответы склеиваются, если совпадают чат и параметры отправки, у них нет
+    entities, клавиатура не конфликтует (одна из двух пустая или это один и тот же
+    объект - готовые клавиатуры из keyboards/ именно такие) и текст влезает в лимит.
+    """
+
+    def __init__(self):
+        self.pending = None
+        self.merged = 0
+
+    def add(self, method) -> bool:
+        """True - ответ отложен в буфер, False - его нужно отправить как есть"""
+        if not isinstance(method, SendMessage) or method.entities is not None:
+            return False
+        if self.pending is None:
+            self.pending = method
+            return True
+
+        pending = self.pending
+        markup = pending.reply_markup
+        if markup is not None and method.reply_markup is not None and markup is not method.reply_markup:
+            return False
+        text = f"{pending.text.rstrip()}\n\n{method.text}"
+        if len(text) > MESSAGE_LIMIT:
+            return False
+        fields = {'text', 'reply_markup'}
+        if pending.model_dump(exclude=fields) != method.model_dump(exclude=fields):
+            return False
+
+        self.pending = pending.model_copy(update={'text': text, 'reply_markup': method.reply_markup or markup})
+        self.merged += 1
+        return True
+
+    def take(self):
+        pending, self.pending = self.pending, None
+        return pending
+
+
+class Outbox(BaseRequestMiddleware):
+    """Все исходящие запросы бота в конкретный чат: общий лимит, лимит на чат, повтор при 429.
+
+    Подключается к сессии бота; ответы хендлеров, отложенные в ReplyBuffer,
+    уходят через него же одним сообщением.
+    """
+
+    def __init__(self, global_rate: float, chat_rate: float, chat_burst: float):
+        self.global_bucket = TokenBucket(global_rate)
+        self.chat_limiter = PerChatLimiter(chat_rate, chat_burst)
+        self.waiting = 0
+        self.sent = 0
+        self.retry_after = 0
+        self.coalesced = 0
+
+    async def __call__(self, make_request, bot, method):
+        buffer = _reply_buffer.get()
+        if buffer is not None:
+            if buffer.add(method):
+                # Ответ уйдёт вместе со следующими; хендлеры результат sendMessage не используют
+                return None
+            pending = buffer.take()
+            if pending is not None:
+                await self.send(make_request, bot, pending)
+        return await self.send(make_request, bot, method)
+
+    async def send(self, make_request, bot, method):
+        chat_id = getattr(method, 'chat_id', None)
+        if chat_id is None:
+            # getUpdates, setWebhook и прочие служебные запросы - без лимитов
+            return await make_request(bot, method)
+
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            self.waiting += 1
+            try:
+                await self.chat_limiter.acquire(chat_id)
+                await self.global_bucket.acquire()
+            finally:
+                self.waiting -= 1
+
+            try:
+                result = await make_request(bot, method)
+            except TelegramRetryAfter as e:
+                self.retry_after += 1
+                logger.warning("429 от Telegram для чата %s, ждём %s с", chat_id, e.retry_after)
+                if attempt == MAX_SEND_ATTEMPTS:
+                    raise
+                # Следующая попытка и остальные отправки в этот чат ждут в его бакете
+                self.chat_limiter.pause(chat_id, e.retry_after)
+                continue
+
+            self.sent += 1
+            return result
+
+    def stats(self) -> dict:
+        return {
+            'waiting': self.waiting,
+            'sent': self.sent,
+            'retry_after': self.retry_after,
+            'coalesced': self.coalesced
+        }
+
+
+def _processes_sharing_limit() -> int:
+    # Лимит Telegram общий на бота - делим его между процессами, которые отвечают пользователям
+    if settings.BOT_MODE == "webhook":
+        return settings.WEBHOOK_WORKERS
+    if settings.BOT_MODE == "sharded":
+        return settings.SHARD_WORKERS
+    return 1
+
+
+outbox = Outbox(
+    settings.TELEGRAM_GLOBAL_RATE / _processes_sharing_limit(),
+    settings.TELEGRAM_CHAT_RATE,
+    settings.TELEGRAM_CHAT_BURST
+)
+
+
+class CoalesceRepliesMiddleware(BaseMiddleware):
+    """Ответы хендлера копятся в ReplyBuffer и отправляются после него одним сообщением.
+
+    Хендлеры, которым нужен результат message.answer (например, чтобы потом
+    отредактировать сообщение о прогрессе), отмечаются flags={"coalesce": False}.
+    """
+
+    async def __call__(self, handler, event, data: dict):
+        if get_flag(data, "coalesce", default=True) is False:
+            return await handler(event, data)
+
+        buffer = ReplyBuffer()
+        token = _reply_buffer.set(buffer)
+        try:
+            return await handler(event, data)
+        finally:
+            _reply_buffer.reset(token)
+            outbox.coalesced += buffer.merged
+            pending = buffer.take()
+            if pending is not None:
+                await data["bot"](pending)
@@ -0,0 +1,67 @@
+import re
+from collections import namedtuple
+
+from services.classifier import guess_category
+from services.money import MAX_AMOUNT, parse_money
+
+# Сколько строк принимаем в одном сообщении с пачкой расходов
+MAX_BATCH_LINES = 50
+
+# Строка пачки: «500 такси», «300,50 еда обед» - сумма, слово для категории, описание
+_ENTRY_LINE = re.compile(r'\s*(?P<amount>\d+(?:[.,]\d{1,2})?)\s+(?P<word>[^\W\d_]\S*)(?:\s+(?P<description>.*\S))?\s*')
+
+# word - слово, по которому определена категория; описание начинается с него
+ExpenseEntry = namedtuple('ExpenseEntry', 'amount category description word')
+
+
+class AmountError(ValueError):
+    """Число распознано, но сумма недопустима; текст исключения можно показать пользователю"""
+
+
+def parse_amount(text: str) -> int:
+    """Сумма из ответа пользователя -> копейки.
+
+    ValueError - не число, AmountError - число вне допустимого диапазона.
+    """
+    amount = parse_money(text)
+    if amount <= 0:
+        raise AmountError("❌ Сумма должна быть больше 0.")
+    if amount > MAX_AMOUNT:
+        raise AmountError("❌ Слишком большая сумма.")
+    return amount
+
+
+def parse_entry(line: str, classify=guess_category) -> ExpenseEntry:
+    """«300 еда обед» -> ExpenseEntry. Для нераспознанной строки - ValueError.
+
+    classify - слово -> категория, например category_classifier.for_user(...)
+    """
+    match = _ENTRY_LINE.fullmatch(line)
+    if match is None:
+        raise ValueError(f"не расход: {line}")
+
+    amount = parse_amount(match['amount'])
+    word = match['word']
+    # Описание - весь текст после суммы: слово категории не теряется, и по первому
+    # слову описания классификатор дообучается так же, как по диалогу
+    description = f"{word} {match['description']}" if match['description'] else word
+    return ExpenseEntry(amount, classify(word), description, word)
+
+
+def parse_entries(text: str, classify=guess_category):
+    """Разбор сообщения с расходами по строке на каждый: (записи, нераспознанные строки).
+
+    Пустые строки пропускаются. Больше MAX_BATCH_LINES строк - ValueError.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if len(lines) > MAX_BATCH_LINES:
+        raise ValueError(f"не больше {MAX_BATCH_LINES} строк за раз")
+
+    entries = []
+    errors = []
+    for line in lines:
+        try:
+            entries.append(parse_entry(line, classify))
+        except ValueError:
+            errors.append(line.strip())
+    return entries, errors
@@ -0,0 +1,35 @@
+import re
+from datetime import datetime
+
+# 2025 | 2025-03 | 2025-01..2025-06
+PERIOD_RE = re.compile(r"^(\d{4})(?:-(\d{1,2}))?(?:\.\.(\d{4})(?:-(\d{1,2}))?)?$")
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1, day=1)
+
+
+def parse_period(text: str):
+    """Период из строки вида 2025, 2025-03 или 2025-01..2025-06.
+
+    Возвращает (начало, конец) - конец не включается. Для некорректной строки - None.
+    """
+    match = PERIOD_RE.match(text.strip())
+    if not match:
+        return None
+
+    start_year, start_month, end_year, end_month = match.groups()
+    try:
+        start = datetime(int(start_year), int(start_month or 1), 1)
+        if end_year:
+            last = datetime(int(end_year), int(end_month or 12), 1)
+        else:
+            last = datetime(int(start_year), int(start_month or 12), 1)
+    except ValueError:
+        return None
+
+    end = add_months(last, 1)
+    if end <= start:
+        return None
+    return start, end
@@ -0,0 +1,57 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """Не больше rate событий в секунду с допустимым всплеском до capacity"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+    def pause(self, seconds: float):
+        """Ничего не выдавать ближайшие seconds секунд (ответ 429 с retry_after)"""
+        self._refill()
+        self.tokens = min(self.tokens, 0) - seconds * self.rate
+
+
+class PerChatLimiter:
+    """Отдельный TokenBucket на каждый чат; редко используемые чаты вытесняются"""
+
+    def __init__(self, rate: float, capacity: float = None, max_chats: int = 10000):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_chats = max_chats
+        self._buckets = OrderedDict()
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._buckets[chat_id] = TokenBucket(self.rate, self.capacity)
+            if len(self._buckets) > self.max_chats:
+                self._buckets.popitem(last=False)
+        self._buckets.move_to_end(chat_id)
+        return bucket
+
+    async def acquire(self, chat_id: int):
+        await self._bucket(chat_id).acquire()
+
+    def pause(self, chat_id: int, seconds: float):
+        self._bucket(chat_id).pause(seconds)
@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict
+
+from config import settings
+
+
+class ReportCache:
+    """LRU-кэш статистики и готовых текстов отчёта/советов по ключу (пользователь, месяц).
+
+    Записи живут не дольше ttl секунд и сбрасываются при любой записи пользователя
+    (добавление, удаление, импорт). Каждый сброс меняет поколение пользователя:
+    читатель берёт generation() до запроса к базе и передаёт его в set(), и значение,
+    посчитанное до параллельной записи, в кэш не попадёт. В webhook-режиме с несколькими процессами
+    запись в другом процессе кэш не сбросит - там свежесть ограничивает ttl.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (user_id, month) -> (expires, {вид: значение})
+        self._months_by_user = {}  # user_id -> set(month)
+        # user_id -> номер последнего сброса; хранятся max_size недавних пользователей
+        self._generations = OrderedDict()
+        self._last_generation = 0
+        # Для вытесненных - максимум их номеров: он не меньше любого, что мог прочитать читатель
+        self._evicted_generation = 0
+
+    def get(self, user_id: int, month, kind: str):
+        key = (user_id, month)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] < time.monotonic():
+            self._drop(key)
+            entry = None
+
+        if entry is None or kind not in entry[1]:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1][kind]
+
+    def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, self._evicted_generation)
+
+    def set(self, user_id: int, month, kind: str, value, generation: int):
+        """generation - значение generation(user_id), прочитанное до подсчёта value"""
+        if self.max_size <= 0 or generation != self.generation(user_id):
+            return
+        key = (user_id, month)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            entry = (time.monotonic() + self.ttl, {})
+            self._entries[key] = entry
+            self._months_by_user.setdefault(user_id, set()).add(month)
+
+        entry[1][kind] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            oldest, _ = self._entries.popitem(last=False)
+            self._forget_month(*oldest)
+
+    def invalidate(self, user_id: int):
+        """Сбросить все месяцы пользователя - запись могла задеть любой из них"""
+        for month in self._months_by_user.pop(user_id, ()):
+            self._entries.pop((user_id, month), None)
+
+        self._last_generation += 1
+        self._generations[user_id] = self._last_generation
+        self._generations.move_to_end(user_id)
+        while len(self._generations) > max(self.max_size, 1):
+            _, evicted = self._generations.popitem(last=False)
+            self._evicted_generation = max(self._evicted_generation, evicted)
+
+    def _drop(self, key):
+        del self._entries[key]
+        self._forget_month(*key)
+
+    def _forget_month(self, user_id: int, month):
+        months = self._months_by_user.get(user_id)
+        if months is not None:
+            months.discard(month)
+            if not months:
+                del self._months_by_user[user_id]
+
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._entries)}
+
+
+report_cache = ReportCache(settings.REPORT_CACHE_SIZE, settings.REPORT_CACHE_TTL)
@@ -0,0 +1,107 @@
+from services import templates
+from services.money import format_money
+from services.rollup import EXPENSE
+
+
+def render_report(stats: dict) -> str:
+    total_income = stats['total_income']
+    parts = [templates.REPORT_HEADER.format(
+        month=stats['month'],
+        income=format_money(total_income),
+        expenses=format_money(stats['total_expenses']),
+        balance=format_money(stats['balance'])
+    )]
+
+    if total_income > 0:
+        parts.append(templates.REPORT_SAVINGS.format(percent=stats['balance'] / total_income * 100))
+        # Проценты считаются от ДОХОДОВ
+        parts.extend(
+            templates.REPORT_CATEGORY.format(
+                category=category, amount=format_money(amount), percent=amount / total_income * 100
+            )
+            for category, amount in stats['expenses_by_category'].items()
+        )
+    else:
+        parts.append("\n")
+
+    return "".join(parts)
+
+
+def render_advice(advice_list: list) -> str:
+    if not advice_list:
+        return templates.ADVICE_EMPTY
+
+    parts = [templates.ADVICE_HEADER]
+    parts.extend(templates.ADVICE_ITEM.format(number=i, advice=advice) for i, advice in enumerate(advice_list, 1))
+    parts.append(templates.ADVICE_FOOTER)
+    return "".join(parts)
+
+
+def render_period_report(title: str, months: list) -> str:
+    if not months:
+        return templates.PERIOD_EMPTY.format(title=title)
+
+    parts = [templates.PERIOD_HEADER.format(title=title)]
+
+    for month in months:
+        parts.append(templates.PERIOD_MONTH.format(
+            month=month['month'],
+            income=format_money(month['total_income']),
+            expenses=format_money(month['total_expenses']),
+            balance=format_money(month['balance']),
+            running_balance=format_money(month['running_balance'])
+        ))
+        for category, amount, delta in month['categories']:
+            if delta is None:
+                change = ""
+            else:
+                change = templates.PERIOD_CHANGE.format(sign='+' if delta >= 0 else '', delta=format_money(delta))
+            parts.append(templates.PERIOD_CATEGORY.format(category=category, amount=format_money(amount), change=change))
+        parts.append("\n")
+
+    parts.append(templates.PERIOD_TOTAL.format(
+        income=format_money(sum(month['total_income'] for month in months)),
+        expenses=format_money(sum(month['total_expenses'] for month in months)),
+        balance=format_money(months[-1]['running_balance'])
+    ))
+    return "".join(parts)
+
+
+def render_last_operations(operations: list) -> str:
+    if not operations:
+        return templates.LAST_HEADER + templates.LAST_EMPTY
+
+    # Операции уже отсортированы по дате (новые сверху)
+    parts = [templates.LAST_HEADER]
+    parts.extend(
+        templates.LAST_OPERATION.format(
+            icon='📤' if op.kind == EXPENSE else '💰',
+            amount=format_money(op.amount),
+            label=op.label,
+            description=f" - {op.description}" if op.description else "",
+            date=op.created_at.strftime("%d.%m %H:%M")
+        )
+        for op in operations
+    )
+    return "".join(parts)
+
+
+def split_message(text: str, limit: int = 4096) -> list:
+    """Разбить длинный отчёт по пустым строкам на части не длиннее лимита Telegram"""
+    parts = []
+    current = ""
+    for block in text.split("\n\n"):
+        candidate = f"{current}\n\n{block}" if current else block
+        if len(candidate) <= limit:
+            current = candidate
+            continue
+        if current:
+            parts.append(current)
+        # Блок сам по себе длиннее лимита - режем по символам
+        while len(block) > limit:
+            parts.append(block[:limit])
+            block = block[limit:]
+        current = block
+    if current:
+        parts.append(current)
+    return parts
@@ -0,0 +1,126 @@
+from sqlalchemy import Date, cast, delete, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert
+
+from database.models import Expense, Income, MonthlyRollup
+
+EXPENSE = 'expense'
+INCOME = 'income'
+
+DEFAULT_INCOME_SOURCE = "Основной доход"
+
+
+def _month_of(timestamp):
+    """Первый день месяца - считается на стороне базы, в её часовом поясе"""
+    return cast(func.date_trunc('month', timestamp), Date)
+
+
+def _accumulate(stmt):
+    """INSERT в агрегаты, который при конфликте прибавляет сумму и количество к существующей строке"""
+    return stmt.on_conflict_do_update(
+        index_elements=[
+            MonthlyRollup.user_id, MonthlyRollup.month,
+            MonthlyRollup.kind, MonthlyRollup.category_id
+        ],
+        set_={
+            'total': MonthlyRollup.total + stmt.excluded.total,
+            'operations_count': MonthlyRollup.operations_count + stmt.excluded.operations_count
+        }
+    )
+
+
+async def _apply(session, user_id: int, kind: str, category_id: int, amount: int, count: int, timestamp):
+    stmt = insert(MonthlyRollup).values(
+        user_id=user_id,
+        month=_month_of(timestamp),
+        kind=kind,
+        category_id=category_id,
+        total=amount,
+        operations_count=count
+    )
+    await session.execute(_accumulate(stmt))
+
+
+async def add_expense_to_rollup(session, expense: Expense):
+    """Учесть новый расход. Вызывается до commit, в той же транзакции, что и INSERT"""
+    # created_at ещё не известен (server_default), но now() в одной транзакции одинаковый
+    await _apply(session, expense.user_id, EXPENSE, expense.category_id,
+                 expense.amount, 1, expense.created_at or func.now())
+
+
+async def add_income_to_rollup(session, income: Income):
+    """Учесть новый доход. Вызывается до commit, в той же транзакции, что и INSERT"""
+    await _apply(session, income.user_id, INCOME, income.source_id,
+                 income.amount, 1, income.created_at or func.now())
+
+
+async def remove_from_rollup(session, operation):
+    """Вычесть удаляемую операцию (Expense или Income) из агрегатов"""
+    if isinstance(operation, Expense):
+        kind, category_id = EXPENSE, operation.category_id
+    else:
+        kind, category_id = INCOME, operation.source_id
+
+    await _apply(session, operation.user_id, kind, category_id,
+                 -operation.amount, -1, literal(operation.created_at))
+
+
+async def rebuild_monthly_rollup(session, user_id: int = None):
+    """Пересчитать агрегаты из исходных таблиц (для починки). Без user_id - для всех"""
+    expenses = select(
+        Expense.user_id,
+        _month_of(Expense.created_at).label('month'),
+        literal(EXPENSE).label('kind'),
+        Expense.category_id,
+        func.sum(Expense.amount).label('total'),
+        func.count().label('operations_count')
+    ).group_by(Expense.user_id, 'month', Expense.category_id)
+
+    incomes = select(
+        Income.user_id,
+        _month_of(Income.created_at).label('month'),
+        literal(INCOME).label('kind'),
+        Income.source_id.label('category_id'),
+        func.sum(Income.amount).label('total'),
+        func.count().label('operations_count')
+    ).group_by(Income.user_id, 'month', Income.source_id)
+
+    clear_stmt = delete(MonthlyRollup)
+    if user_id is not None:
+        expenses = expenses.where(Expense.user_id == user_id)
+        incomes = incomes.where(Income.user_id == user_id)
+        clear_stmt = clear_stmt.where(MonthlyRollup.user_id == user_id)
+
+    await session.execute(clear_stmt)
+    await session.execute(
+        insert(MonthlyRollup).from_select(
+            ['user_id', 'month', 'kind', 'category_id', 'total', 'operations_count'],
+            union_all(expenses, incomes)
+        )
+    )
+    await session.commit()
+
+
+async def add_inserted_to_rollup(session, model, ids: list):
+    """Учесть пачку только что вставленных строк одним INSERT ... SELECT ... GROUP BY"""
+    if not ids:
+        return
+
+    if model is Expense:
+        kind, category_id = EXPENSE, Expense.category_id
+    else:
+        kind, category_id = INCOME, Income.source_id
+
+    month = _month_of(model.created_at)
+    rows = select(
+        model.user_id,
+        month,
+        literal(kind),
+        category_id,
+        func.sum(model.amount),
+        func.count()
+    ).where(model.id.in_(ids)).group_by(model.user_id, month, category_id)
+
+    stmt = insert(MonthlyRollup).from_select(
+        ['user_id', 'month', 'kind', 'category_id', 'total', 'operations_count'], rows
+    )
+    await session.execute(_accumulate(stmt))
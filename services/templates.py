@@ -0,0 +1,97 @@
+# Шаблоны сообщений бота. Разбираются один раз при импорте: статичные тексты - готовые
+# строки, остальные - str.format-шаблоны, которые заполняются одним вызовом format_map
+# и склеиваются через join вместо многократной конкатенации
+
+WELCOME = (
+    "👋 Добро пожаловать в Финансового Помощника!\n\n"
+    "💡 <b>Основные возможности:</b>\n"
+    "• 📥 Внесение доходов и расходов\n"
+    "• 📊 Статистика за любой период\n"
+    "• 💡 Персональные финансовые советы\n"
+    "• 🎯 Анализ по категориям\n\n"
+    "Выберите действие в меню ниже:"
+)
+
+HELP = (
+    "📋 <b>Доступные команды:</b>\n\n"
+
+    "🔹 <b>Основные команды:</b>\n"
+    "• /start - Главное меню\n"
+    "• /help - Эта справка\n"
+    "• /report - Финансовый отчёт\n"
+    "• /report 6, /report 2025-01..2025-06 - отчёт за период\n"
+    "• /chart, /chart 6 - графики расходов и доходов\n"
+    "• /advice - Персональные советы\n"
+    "• /delete - Удалить операцию\n"
+    "• /last - Последние операции\n"
+    "• /import - Импорт банковской выписки (CSV)\n"
+    "• /export - Выгрузка операций (CSV/XLSX)\n\n"
+
+    "⚡ <b>Быстрые команды:</b>\n"
+    "<code>/spent 500 такси</code> - быстро добавить расход\n"
+    "<code>/spent 300 еда продукты</code> - с описанием\n"
+    "<code>/spent 1000 кино</code>\n"
+    "Несколько расходов сразу - по одному на строку, можно без /spent:\n"
+    "<code>500 такси\n300 еда обед\n1200 кафе</code>\n\n"
+
+    "🎯 <b>Категории для /spent:</b>\n"
+    "• еда, продукты 🍎\n"
+    "• такси, транспорт 🚗\n"
+    "• кино, развлечения 🎮\n"
+    "• кафе, ресторан 🍽️\n"
+    "• магазин, покупки 🛍️\n"
+    "• здоровье, врач 💊\n"
+    "• жилье, аренда 🏠\n"
+    "• кредит, долг, заем 💳\n\n"
+
+    "💡 <b>Финансовые правила:</b>\n"
+    "• 50% - обязательные расходы\n"
+    "• 30% - желания и развлечения\n"
+    "• 20% - накопления и инвестиции"
+)
+
+# --- Месячный отчёт ---
+
+REPORT_HEADER = (
+    "📊 <b>Финансовый отчёт за {month}</b>\n\n"
+    "💰 <b>Доходы:</b> {income} ₽\n"
+    "📤 <b>Расходы:</b> {expenses} ₽\n"
+    "✅ <b>Баланс:</b> {balance} ₽\n"
+)
+REPORT_SAVINGS = "📈 <b>Накопления:</b> {percent:.1f}% от доходов\n\n📊 <b>Структура бюджета:</b>\n"
+REPORT_CATEGORY = "• {category}: {amount} ₽ ({percent:.1f}% доходов)\n"
+
+# --- Советы ---
+
+ADVICE_EMPTY = "📊 Недостаточно данных для анализа. Добавьте несколько доходов и расходов."
+ADVICE_HEADER = "💡 <b>Персональные финансовые советы:</b>\n\n"
+ADVICE_ITEM = "{number}. {advice}\n"
+ADVICE_FOOTER = (
+    "\n📚 <b>Общие рекомендации:</b>\n"
+    "• Правило 50/30/20: 50% на нужды, 30% на желания, 20% на накопления\n"
+    "• Создайте финансовую подушку безопасности (3-6 месячных доходов)\n"
+    "• Регулярно отслеживайте свои финансы"
+)
+
+# --- Отчёт за период ---
+
+PERIOD_EMPTY = "📊 <b>{title}</b>\n\n📭 За этот период операций нет"
+PERIOD_HEADER = "📊 <b>{title}</b>\n\n"
+PERIOD_MONTH = (
+    "📅 <b>{month}</b>\n"
+    "💰 {income} ₽ · 📤 {expenses} ₽ · "
+    "✅ {balance} ₽ (нарастающим итогом {running_balance} ₽)\n"
+)
+PERIOD_CATEGORY = "• {category}: {amount} ₽{change}\n"
+PERIOD_CHANGE = " ({sign}{delta} ₽ к прошлому месяцу)"
+PERIOD_TOTAL = (
+    "📈 <b>Итого за период:</b> доходы {income} ₽, "
+    "расходы {expenses} ₽, "
+    "баланс {balance} ₽"
+)
+
+# --- Последние операции ---
+
+LAST_HEADER = "📋 <b>Последние операции:</b>\n\n"
+LAST_EMPTY = "📭 Операций пока нет\n💸 Добавьте первый расход: /spent 500 такси"
+LAST_OPERATION = "{icon} {amount} ₽ - {label}{description}\n<i>🕐 {date}</i>\n\n"
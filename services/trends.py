@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from sqlalchemy import BigInteger, case, cast, func, select, text
+
+from database.models import MonthlyRollup
+from services.categories import category_registry
+from services.finance_calculations import RUSSIAN_MONTHS
+from services.rollup import EXPENSE, INCOME
+
+
+async def get_period_report(user_id: int, session, start: datetime, end: datetime):
+    """Помесячные итоги за [start, end) одним запросом с оконными функциями.
+
+    Для каждого месяца: доходы, расходы, баланс и нарастающий баланс с начала
+    периода, а для каждой категории расходов - изменение к предыдущему месяцу
+    (None, если в предыдущем месяце категории не было).
+    """
+    per_month = select(
+        MonthlyRollup.month,
+        MonthlyRollup.kind,
+        MonthlyRollup.category_id,
+        cast(func.sum(MonthlyRollup.total), BigInteger).label('total')
+    ).where(
+        MonthlyRollup.user_id == user_id,
+        MonthlyRollup.month >= start.date(),
+        MonthlyRollup.month < end.date(),
+        MonthlyRollup.operations_count > 0
+    ).group_by(MonthlyRollup.month, MonthlyRollup.kind, MonthlyRollup.category_id).cte('per_month')
+
+    signed = case((per_month.c.kind == INCOME, per_month.c.total), else_=-per_month.c.total)
+    by_category = {'partition_by': (per_month.c.kind, per_month.c.category_id), 'order_by': per_month.c.month}
+    previous_month = func.lag(per_month.c.month).over(**by_category)
+    previous_total = func.lag(per_month.c.total).over(**by_category)
+
+    stmt = select(
+        per_month.c.month,
+        per_month.c.kind,
+        per_month.c.category_id,
+        per_month.c.total,
+        case(
+            (previous_month == per_month.c.month - text("interval '1 month'"),
+             per_month.c.total - previous_total),
+            else_=None
+        ).label('delta'),
+        cast(func.sum(signed).over(partition_by=per_month.c.month), BigInteger).label('net'),
+        # RANGE по месяцу: в сумму входят все строки текущего месяца и всех предыдущих
+        cast(func.sum(signed).over(order_by=per_month.c.month, range_=(None, 0)), BigInteger).label('running_balance')
+    ).order_by(per_month.c.month, per_month.c.kind, per_month.c.total.desc())
+
+    rows = (await session.execute(stmt)).all()
+    await category_registry.resolve(session, {row.category_id for row in rows})
+
+    months = {}
+    for row in rows:
+        month = months.get(row.month)
+        if month is None:
+            month = months[row.month] = {
+                'month': f"{RUSSIAN_MONTHS[row.month.month]} {row.month.year}",
+                'total_income': 0,
+                'total_expenses': 0,
+                'balance': row.net,
+                'running_balance': row.running_balance,
+                'categories': []
+            }
+        if row.kind == EXPENSE:
+            month['total_expenses'] += row.total
+            month['categories'].append((category_registry.label(row.category_id), row.total, row.delta))
+        else:
+            month['total_income'] += row.total
+
+    return list(months.values())
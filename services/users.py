@@ -0,0 +1,56 @@
+from collections import OrderedDict
+
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from database.models import User
+
+
+class KnownUsersCache:
+    """Ограниченный LRU-набор telegram_id, которые уже есть в таблице users"""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._ids = OrderedDict()
+
+    def __contains__(self, telegram_id: int) -> bool:
+        if telegram_id in self._ids:
+            self._ids.move_to_end(telegram_id)
+            return True
+        return False
+
+    def add(self, telegram_id: int):
+        self._ids[telegram_id] = None
+        self._ids.move_to_end(telegram_id)
+        if len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+
+known_users = KnownUsersCache(settings.KNOWN_USERS_CACHE_SIZE)
+
+
+async def ensure_user(session, from_user) -> bool:
+    """Зарегистрировать пользователя, если он ещё не известен.
+
+    Известные пользователи не стоят ни одного запроса. Для новых выполняется
+    INSERT ... ON CONFLICT DO NOTHING без commit - строка пользователя уходит
+    в базу в той же транзакции, что и операция. Возвращает True, если запрос был.
+    """
+    if from_user.id in known_users:
+        return False
+
+    stmt = insert(User).values(
+        telegram_id=from_user.id,
+        username=from_user.username,
+        first_name=from_user.first_name
+    ).on_conflict_do_nothing(index_elements=[User.telegram_id])
+    await session.execute(stmt)
+
+    # Запоминаем только после успешного commit: при откате строки в базе нет
+    event.listen(
+        session.sync_session, "after_commit",
+        lambda _session: known_users.add(from_user.id),
+        once=True
+    )
+    return True
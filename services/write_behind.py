@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from sqlalchemy import insert as sa_insert
+from sqlalchemy.dialects.postgresql import insert
+
+from config import settings
+from database.base import AsyncSessionLocal
+from database.models import Expense, Income, User
+from services.categories import category_registry
+from services.rollup import EXPENSE, INCOME, add_inserted_to_rollup
+from services.users import known_users
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Отложенная пакетная запись расходов и доходов.
+
+    Операции копятся в памяти и уходят в базу одной транзакцией: многострочный
+    INSERT в expenses/incomes и пересчёт агрегатов по вставленным id. Сброс
+    происходит при наборе batch_size строк, раз в flush_interval секунд и при
+    остановке бота. Несброшенные операции пользователя видны через pending_for().
+    """
+
+    def __init__(self, session_factory=AsyncSessionLocal, batch_size: int = 500, flush_interval: float = 0.5):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._expenses = []
+        self._incomes = []
+        self._users = {}  # telegram_id -> строка для users
+        self._in_flight = ([], [])  # пачка, которая сейчас пишется в базу
+        self._flush_lock = asyncio.Lock()
+        self._flusher = None
+
+    def __len__(self):
+        return len(self._expenses) + len(self._incomes)
+
+    def start(self):
+        if self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+
+    async def close(self):
+        if self._flusher is not None:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+
+    def _remember_user(self, from_user):
+        if from_user.id not in known_users:
+            self._users[from_user.id] = {
+                'telegram_id': from_user.id,
+                'username': from_user.username,
+                'first_name': from_user.first_name
+            }
+
+    async def _enqueue(self, rows: list, from_user, row: dict, label: str):
+        self.start()
+        self._remember_user(from_user)
+        # Время фиксируем сразу, а не при сбросе: порядок и месяц операции не меняются
+        row['created_at'] = datetime.now().astimezone()
+        rows.append((row, label))
+
+        if len(self) >= self.batch_size:
+            try:
+                await self.flush()
+            except Exception:
+                # Операция уже в очереди и будет записана следующим сбросом
+                logger.exception("Не удалось записать отложенные операции")
+
+    async def add_expense(self, from_user, amount: int, category: str, description: str = None):
+        await self._enqueue(self._expenses, from_user, {
+            'user_id': from_user.id,
+            'amount': amount,
+            'category_id': await category_registry.get_id(EXPENSE, category),
+            'description': description
+        }, category)
+
+    async def add_income(self, from_user, amount: int, source: str):
+        await self._enqueue(self._incomes, from_user, {
+            'user_id': from_user.id,
+            'amount': amount,
+            'source_id': await category_registry.get_id(INCOME, source)
+        }, source)
+
+    def pending_for(self, user_id: int, month: datetime):
+        """Несброшенные расходы и доходы пользователя за месяц: списки (строка, название категории)"""
+        def same_month(row):
+            return (row['user_id'] == user_id and row['created_at'].year == month.year
+                    and row['created_at'].month == month.month)
+
+        flushing_expenses, flushing_incomes = self._in_flight
+        return (
+            [(row, label) for row, label in flushing_expenses + self._expenses if same_month(row)],
+            [(row, label) for row, label in flushing_incomes + self._incomes if same_month(row)]
+        )
+
+    async def flush(self):
+        async with self._flush_lock:
+            if not len(self):
+                return
+
+            expenses, self._expenses = self._expenses, []
+            incomes, self._incomes = self._incomes, []
+            users, self._users = self._users, {}
+            # Пока транзакция не закоммичена, пачка должна оставаться видна в pending_for
+            self._in_flight = (expenses, incomes)
+
+            try:
+                async with self.session_factory() as session:
+                    if users:
+                        await session.execute(
+                            insert(User).values(list(users.values())).on_conflict_do_nothing(
+                                index_elements=[User.telegram_id]
+                            )
+                        )
+                    for model, rows in ((Expense, expenses), (Income, incomes)):
+                        if rows:
+                            values = [row for row, _ in rows]
+                            result = await session.execute(sa_insert(model).returning(model.id), values)
+                            await add_inserted_to_rollup(session, model, result.scalars().all())
+                    await session.commit()
+            except Exception:
+                # Возвращаем пачку в начало очереди - запишется при следующем сбросе
+                self._expenses = expenses + self._expenses
+                self._incomes = incomes + self._incomes
+                self._users = {**users, **self._users}
+                raise
+            finally:
+                self._in_flight = ([], [])
+
+            for telegram_id in users:
+                known_users.add(telegram_id)
+            logger.debug("Записано пачкой: %s расходов, %s доходов", len(expenses), len(incomes))
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("Не удалось записать отложенные операции")
+
+
+pending_writes = WriteBehindQueue(
+    batch_size=settings.WRITE_BEHIND_BATCH_SIZE,
+    flush_interval=settings.WRITE_BEHIND_FLUSH_INTERVAL
+)
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import time
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+from aiogram.utils.backoff import Backoff, BackoffConfig
+
+logger = logging.getLogger(__name__)
+
+# Каждые столько секунд супервизор пишет в лог глубину очередей воркеров
+STATS_INTERVAL = 60
+# Паузы между повторами getUpdates после сетевой ошибки - как у dp.start_polling
+POLLING_BACKOFF = BackoffConfig(min_delay=1.0, max_delay=5.0, factor=1.3, jitter=0.1)
+
+
+def update_user_id(update: dict) -> int:
+    """id пользователя из сырого Update: from.id события, иначе id чата"""
+    for field, event in update.items():
+        if field == "update_id" or not isinstance(event, dict):
+            continue
+        if "from" in event:
+            return event["from"]["id"]
+        if "user" in event:
+            return event["user"]["id"]
+        if "chat" in event:
+            return event["chat"]["id"]
+    return 0
+
+
+class ShardStats:
+    """Метрики супервизора: сколько апдейтов отдано каждому воркеру и сколько ждали места в очереди"""
+
+    def __init__(self, queues):
+        self.queues = queues
+        self.dispatched = [0] * len(queues)
+        self.blocked_seconds = [0.0] * len(queues)
+
+    def queue_depths(self) -> list:
+        return [q.qsize() for q in self.queues]
+
+    def snapshot(self) -> dict:
+        return {
+            'queue_depth': self.queue_depths(),
+            'dispatched': list(self.dispatched),
+            'blocked_seconds': list(self.blocked_seconds)
+        }
+
+
+class ShardSupervisor:
+    """Получает апдейты long polling'ом и раскладывает их по N процессам.
+
+    Шард выбирается по from_user.id, поэтому шаги FSM одного пользователя всегда
+    попадают в один процесс и обрабатываются по порядку. Очереди ограничены:
+    если воркер не успевает, супервизор ждёт и не запрашивает новые апдейты.
+    """
+
+    def __init__(self, worker_target, workers: int, queue_size: int):
+        self.queues = [multiprocessing.Queue(maxsize=queue_size) for _ in range(workers)]
+        self.processes = [
+            multiprocessing.Process(target=worker_target, args=(q, i), name=f"shard-{i}")
+            for i, q in enumerate(self.queues)
+        ]
+        self.stats = ShardStats(self.queues)
+
+    def shard_for(self, update: dict) -> int:
+        return update_user_id(update) % len(self.queues)
+
+    async def dispatch(self, update: dict):
+        shard = self.shard_for(update)
+        target = self.queues[shard]
+        try:
+            target.put_nowait(update)
+        except queue.Full:
+            # Обратное давление: ждём место в очереди, не блокируя event loop
+            started = time.perf_counter()
+            await asyncio.get_running_loop().run_in_executor(None, target.put, update)
+            self.stats.blocked_seconds[shard] += time.perf_counter() - started
+        self.stats.dispatched[shard] += 1
+
+    async def _log_stats(self):
+        while True:
+            await asyncio.sleep(STATS_INTERVAL)
+            logger.info("Очереди шардов: %s", self.stats.snapshot())
+
+    def start(self):
+        """Запустить воркеры. Вызывается до asyncio.run, чтобы не форкать работающий event loop"""
+        for process in self.processes:
+            process.start()
+
+    async def run(self, bot, allowed_updates=None):
+        stats_task = asyncio.create_task(self._log_stats())
+        offset = None
+        backoff = Backoff(config=POLLING_BACKOFF)
+        try:
+            while True:
+                try:
+                    updates = await bot.get_updates(
+                        offset=offset, timeout=30, allowed_updates=allowed_updates
+                    )
+                except TelegramRetryAfter as e:
+                    logger.warning("429 на getUpdates, ждём %s с", e.retry_after)
+                    await asyncio.sleep(e.retry_after)
+                    continue
+                except (TelegramNetworkError, TelegramServerError) as e:
+                    # Временный сбой сети или Bot API - воркеры не останавливаем, повторяем запрос
+                    logger.error("Не удалось получить апдейты: %s: %s", type(e).__name__, e)
+                    logger.warning("Повтор через %.1f с (попытка %s)", backoff.next_delay, backoff.counter)
+                    await backoff.asleep()
+                    continue
+                backoff.reset()
+
+                for update in updates:
+                    await self.dispatch(update.model_dump(mode="json", by_alias=True, exclude_none=True))
+                    offset = update.update_id + 1
+        finally:
+            stats_task.cancel()
+            self.stop()
+
+    def stop(self):
+        for q in self.queues:
+            q.put(None)
+        for process in self.processes:
+            process.join(timeout=30)
+
+
+async def consume(update_queue, handle, max_in_flight: int = 100):
+    """Цикл воркера: апдейты одного пользователя по порядку, разных - параллельно"""
+    loop = asyncio.get_running_loop()
+    in_flight = asyncio.Semaphore(max_in_flight)
+    user_tails = {}  # user_id -> последняя задача этого пользователя
+
+    async def process(update: dict, previous):
+        try:
+            if previous is not None:
+                await asyncio.gather(previous, return_exceptions=True)
+            await handle(update)
+        except Exception:
+            logger.exception("Ошибка обработки апдейта %s", update.get("update_id"))
+        finally:
+            in_flight.release()
+
+    while True:
+        update = await loop.run_in_executor(None, update_queue.get)
+        if update is None:
+            break
+
+        await in_flight.acquire()
+        user_id = update_user_id(update)
+        task = asyncio.create_task(process(update, user_tails.get(user_id)))
+        user_tails[user_id] = task
+        task.add_done_callback(
+            lambda done, uid=user_id: user_tails.pop(uid, None) if user_tails.get(uid) is done else None
+        )
+
+    pending = [task for task in user_tails.values() if not task.done()]
+    if pending:
+        await asyncio.gather(*pending, return_exceptions=True)
@@ -0,0 +1,53 @@
+import pytest
+
+from services.categories import CATEGORY_KEYWORDS, OTHER_EXPENSE_CATEGORY
+from services.classifier import KeywordTrie, guess_category, learning_word, stem
+
+trie = KeywordTrie(CATEGORY_KEYWORDS)
+
+
+@pytest.mark.parametrize('word, word_stem', [
+    ("продуктов", "продукт"),
+    ("продукты", "продукт"),
+    ("Ресторане", "ресторан"),
+    ("такси", "такс"),
+    ("ёлки", "елк"),
+    ("кафе,", "каф"),
+])
+def test_stem(word, word_stem):
+    assert stem(word) == word_stem
+
+
+@pytest.mark.parametrize('word, category', [
+    ("продуктов", '🍎 Продукты'),
+    ("продуктовый", '🍎 Продукты'),
+    ("ресторане", '🍽️ Рестораны и кафе'),
+    ("бар", '🍽️ Рестораны и кафе'),
+    ("бары", '🍽️ Рестораны и кафе'),
+    ("кафешке", '🍽️ Рестораны и кафе'),
+    ("барбершоп", None),
+    ("едальня", None),
+])
+def test_keyword_trie_lookup(word, category):
+    assert trie.lookup(stem(word)) == category
+
+
+@pytest.mark.parametrize('word, category', [
+    ("аптеке", '💊 Здоровье'),
+    ("барбершоп", OTHER_EXPENSE_CATEGORY),
+])
+def test_guess_category(word, category):
+    assert guess_category(word) == category
+
+
+@pytest.mark.parametrize('description, word', [
+    ("с друзьями", "друзьями"),
+    ("для дома и семьи", "дома"),
+    ("кино с друзьями", "кино"),
+    ("«Пятёрочка», 2 пакета", "пятёрочка"),
+    ("в 10", None),
+    ("", None),
+    (None, None),
+])
+def test_learning_word(description, word):
+    assert learning_word(description) == word
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from services import importer
+from services.importer import IMPORTED_INCOME_SOURCE, STAGING_COLUMNS, import_statement, iter_statement
+
+STATEMENT = (
+    "Дата;Сумма;Описание\n"
+    "01.05.2026;-500,00;такси домой\n"
+    "02.05.2026 12:30;1000;зарплата\n"
+    "не дата;-100;пропускается\n"
+    "03.05.2026;-250,50;\n"
+)
+
+
+async def _chunks(data: bytes, size: int):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+async def _collect(chunks):
+    return [record async for record in iter_statement(chunks)]
+
+
+def test_iter_statement_parses_expenses_and_incomes():
+    records = asyncio.run(_collect(_chunks(STATEMENT.encode(), 7)))
+
+    assert [(kind, amount, label, description) for kind, _, amount, label, description in records] == [
+        ('expense', 50000, '🚗 Транспорт', 'такси домой'),
+        ('income', 100000, IMPORTED_INCOME_SOURCE, None),
+        ('expense', 25050, '💾 Прочее', None),
+    ]
+
+
+def test_iter_statement_reads_cp1251():
+    records = asyncio.run(_collect(_chunks(STATEMENT.encode('cp1251'), 1024)))
+    assert len(records) == 3
+
+
+def test_iter_statement_detects_cp1251_after_ascii_chunks():
+    # Первые чанки - только ASCII, кириллица начинается дальше
+    statement = "Date;Amount\n" + "01.05.2026;-100\n" * 5000 + "02.05.2026;-500;такси\n"
+    records = asyncio.run(_collect(_chunks(statement.encode('cp1251'), 64 * 1024)))
+    assert len(records) == 5001
+
+
+def test_iter_statement_rejects_undecodable_file():
+    statement = "Дата;Сумма\n01.05.2026;-100\n".encode() + b"\x98\xff\n"
+    with pytest.raises(importer.StatementFormatError):
+        asyncio.run(_collect(_chunks(statement, 1024)))
+
+
+class FakeDriver:
+    def __init__(self):
+        self.copies = []
+
+    async def copy_records_to_table(self, table, *, records, columns=None):
+        self.copies.append((table, list(records), columns))
+
+
+class FakeSession:
+    def __init__(self, driver):
+        self.driver = driver
+        self.statements = []
+        self.committed = False
+
+    async def connection(self):
+        return self
+
+    async def get_raw_connection(self):
+        return self
+
+    @property
+    def driver_connection(self):
+        return self.driver
+
+    async def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+
+    async def commit(self):
+        self.committed = True
+
+
+def test_import_statement_copies_records_matching_staging_columns(monkeypatch):
+    ids = {}
+
+    async def get_id(kind, label):
+        return ids.setdefault((kind, label), len(ids) + 1)
+
+    monkeypatch.setattr(importer.category_registry, 'get_id', get_id)
+    # Маленький размер пачки - проверяются оба вызова COPY
+    monkeypatch.setattr(importer, 'COPY_CHUNK_SIZE', 2)
+    driver = FakeDriver()
+    session = FakeSession(driver)
+
+    imported = asyncio.run(import_statement(session, 42, _chunks(STATEMENT.encode(), 64)))
+
+    assert imported == 3
+    assert session.committed
+    assert [len(records) for _, records, _ in driver.copies] == [2, 1]
+    for table, records, columns in driver.copies:
+        assert table == 'import_staging'
+        assert columns == STAGING_COLUMNS
+        assert all(len(record) == len(columns) for record in records)
+
+    taxi = driver.copies[0][1][0]
+    assert taxi[STAGING_COLUMNS.index('category_id')] == ids[('expense', '🚗 Транспорт')]
+    assert taxi[STAGING_COLUMNS.index('amount')] == 50000
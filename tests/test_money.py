@@ -0,0 +1,36 @@
+import pytest
+
+from services.money import format_money, parse_money
+
+
+@pytest.mark.parametrize('text, kopecks', [
+    ("500", 50000),
+    ("1 000", 100000),
+    ("1\xa0000", 100000),
+    ("1000,50", 100050),
+    ("1000.5", 100050),
+    ("1.500.50", 150050),
+    ("0,005", 1),
+    ("0,004", 0),
+    ("99,999", 10000),
+    ("-250,50", -25050),
+])
+def test_parse_money(text, kopecks):
+    assert parse_money(text) == kopecks
+
+
+@pytest.mark.parametrize('text', ["", "сто", "1,5,", "12abc"])
+def test_parse_money_rejects_non_numbers(text):
+    with pytest.raises(ValueError):
+        parse_money(text)
+
+
+@pytest.mark.parametrize('kopecks, text', [
+    (0, "0.00"),
+    (5, "0.05"),
+    (150050, "1,500.50"),
+    (-25050, "-250.50"),
+    (100_000_000, "1,000,000.00"),
+])
+def test_format_money(kopecks, text):
+    assert format_money(kopecks) == text
@@ -0,0 +1,86 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from handlers import expenses
+from handlers.expenses import batch_entries
+from services.parsing import MAX_BATCH_LINES, AmountError, ExpenseEntry, parse_amount, parse_entries, parse_entry
+
+
+def _classify(word: str) -> str:
+    return f"категория {word}"
+
+
+@pytest.mark.parametrize('line, entry', [
+    ("500 такси", ExpenseEntry(50000, "категория такси", "такси", "такси")),
+    ("300,50 еда обед", ExpenseEntry(30050, "категория еда", "еда обед", "еда")),
+    ("  1200.5 кафе с друзьями  ", ExpenseEntry(120050, "категория кафе", "кафе с друзьями", "кафе")),
+])
+def test_parse_entry(line, entry):
+    assert parse_entry(line, _classify) == entry
+
+
+@pytest.mark.parametrize('line', ["такси 500", "500", "500 123", "0 такси", "1.2.3 такси"])
+def test_parse_entry_rejects_bad_lines(line):
+    with pytest.raises(ValueError):
+        parse_entry(line, _classify)
+
+
+@pytest.mark.parametrize('text', ["0", "-5", "2000000000"])
+def test_parse_amount_out_of_range(text):
+    with pytest.raises(AmountError):
+        parse_amount(text)
+
+
+def test_batch_with_bad_line_returns_errors():
+    entries, errors = parse_entries("500 такси\n\nкупил хлеб\n300 еда", _classify)
+
+    assert [entry.amount for entry in entries] == [50000, 30000]
+    assert errors == ["купил хлеб"]
+
+
+@pytest.mark.parametrize('text, accepted', [
+    ("500 такси\n300 еда обед", True),
+    ("500 такси\nкупил хлеб\n300 еда", False),
+    ("привет", False),
+    ("\n".join(["100 такси"] * (MAX_BATCH_LINES + 1)), False),
+])
+def test_free_text_batch_is_saved_only_without_errors(text, accepted):
+    # Пачка с хотя бы одной нераспознанной строкой не доходит до сохранения
+    assert batch_entries(SimpleNamespace(text=text)) is accepted
+
+
+class FakeMessage:
+    def __init__(self):
+        self.from_user = SimpleNamespace(id=1)
+        self.answers = []
+
+    async def answer(self, text, **kwargs):
+        self.answers.append(text)
+
+
+def test_spent_batch_with_bad_line_saves_nothing(monkeypatch):
+    saved = []
+
+    async def for_user(session, user_id):
+        return _classify
+
+    async def save_expenses(session, user, entries):
+        saved.extend(entries)
+
+    monkeypatch.setattr(expenses.category_classifier, 'for_user', for_user)
+    monkeypatch.setattr(expenses, 'save_expenses', save_expenses)
+    message = FakeMessage()
+
+    command = SimpleNamespace(args="500 такси\nкупил хлеб")
+    asyncio.run(expenses.quick_add_expense(message, session=None, command=command))
+
+    assert saved == []
+    assert "купил хлеб" in message.answers[0]
+    assert "Ничего не добавлено" in message.answers[0]
+
+
+def test_too_many_lines():
+    with pytest.raises(ValueError):
+        parse_entries("\n".join(["100 такси"] * (MAX_BATCH_LINES + 1)), _classify)
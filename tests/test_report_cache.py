@@ -0,0 +1,34 @@
+from services.report_cache import ReportCache
+
+
+def test_set_after_concurrent_invalidate_is_skipped():
+    cache = ReportCache(max_size=10, ttl=60)
+    generation = cache.generation(1)
+
+    # Пока отчёт считался, операция записалась и сбросила кэш
+    cache.invalidate(1)
+    cache.set(1, 'may', 'report', "старые суммы", generation)
+
+    assert cache.get(1, 'may', 'report') is None
+
+
+def test_set_with_current_generation_is_cached():
+    cache = ReportCache(max_size=10, ttl=60)
+    cache.invalidate(1)
+    generation = cache.generation(1)
+
+    cache.set(1, 'may', 'report', "отчёт", generation)
+
+    assert cache.get(1, 'may', 'report') == "отчёт"
+
+
+def test_evicted_generation_still_rejects_stale_value():
+    cache = ReportCache(max_size=1, ttl=60)
+    cache.invalidate(1)
+    generation = cache.generation(1)
+
+    cache.invalidate(1)
+    cache.invalidate(2)  # вытесняет поколение пользователя 1
+
+    cache.set(1, 'may', 'report', "старые суммы", generation)
+    assert cache.get(1, 'may', 'report') is None
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import multiprocessing
+
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def build_webhook_app(bot, dp) -> web.Application:
+    """aiohttp-приложение, которое принимает апдейты на WEBHOOK_PATH.
+
+    Апдейт обрабатывается в фоне, Telegram сразу получает 200 OK.
+    Локально можно отправить записанный Update:
+    curl -X POST -H 'Content-Type: application/json' -d @update.json localhost:8080/webhook
+    """
+    app = web.Application()
+    SimpleRequestHandler(
+        dispatcher=dp,
+        bot=bot,
+        secret_token=settings.WEBHOOK_SECRET or None,
+        handle_in_background=True
+    ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    return app
+
+
+async def register_webhook(bot):
+    """Сообщить Telegram адрес вебхука (один раз, до запуска воркеров)"""
+    if not settings.WEBHOOK_BASE_URL:
+        logger.warning("WEBHOOK_BASE_URL не задан - вебхук в Telegram не регистрируется")
+        return
+
+    await bot.set_webhook(
+        url=settings.WEBHOOK_BASE_URL.rstrip("/") + settings.WEBHOOK_PATH,
+        secret_token=settings.WEBHOOK_SECRET or None,
+        max_connections=100
+    )
+    logger.info("Вебхук зарегистрирован: %s%s", settings.WEBHOOK_BASE_URL, settings.WEBHOOK_PATH)
+
+
+async def serve(app: web.Application):
+    """Слушать общий порт: с reuse_port ядро распределяет соединения между процессами"""
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(
+        runner,
+        host=settings.WEBHOOK_HOST,
+        port=settings.WEBHOOK_PORT,
+        reuse_port=settings.WEBHOOK_WORKERS > 1
+    )
+    await site.start()
+    logger.info("Вебхук слушает %s:%s%s", settings.WEBHOOK_HOST, settings.WEBHOOK_PORT, settings.WEBHOOK_PATH)
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+def run_workers(target, workers: int):
+    """Запустить target в workers процессах и ждать их завершения"""
+    if workers <= 1:
+        target(0)
+        return
+
+    processes = [
+        multiprocessing.Process(target=target, args=(i,), name=f"webhook-worker-{i}")
+        for i in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()